@@ -0,0 +1,47 @@
+"""Synthetic netinfos (WiFi stars) shared by the tests of large plans."""
+
+def add_wifi_network(info, net_name, ap, terminals, locations=None):
+    """
+    Add a WiFi network (AP + terminals, system wifi1) to a netinfo. Units not
+    in the netinfo are added, at locations (dictionary of pairs (name,
+    location)) or at a distinct location if not given.
+    """
+    units = info.setdefault("units", {})
+    for name in [ap] + terminals:
+        if name not in units:
+            location = (locations or {}).get(name, [len(units), len(units) % 7])
+            units[name] = {"location": list(location)}
+    info.setdefault("networks", {})[net_name] = {
+        "mode": {"standard": "wifi", "wifi_mode": "wifia-6mbs"},
+        "node": {"name": ap, "system": "wifi1"},
+        "terminals": [{"name": name, "system": "wifi1"} for name in terminals],
+    }
+    return info
+
+def create_star_netinfo(nnetworks, nterminals):
+    """Return a netinfo with nnetworks unconnected networks (1 AP + nterminals STAs)."""
+    info = {"units": {}, "networks": {}}
+    for index in range(nnetworks):
+        ap = "ap%d" % index
+        terminals = ["sta%d-%d" % (index, terminal) for terminal in range(nterminals)]
+        locations = dict((name, [1000 * index, 100 * terminal_index])
+            for (terminal_index, name) in enumerate([ap] + terminals))
+        add_wifi_network(info, "net%d" % index, ap, terminals, locations)
+    return info
+
+def create_tree_netinfo(branching):
+    """
+    Return a netinfo with a tree of networks. The AP "root" has branching[0]
+    terminals (n0, n1, ...); each terminal of a level but the last one is
+    the AP of a network (named as its AP) with branching[level] terminals
+    (n0-0, n0-1, ...).
+    """
+    info = {"units": {}, "networks": {}}
+    def _add_subtree(ap, prefix, level):
+        terminals = [prefix + str(index) for index in range(branching[level])]
+        add_wifi_network(info, ap, ap, terminals)
+        if level + 1 < len(branching):
+            for terminal in terminals:
+                _add_subtree(terminal, terminal + "-", level + 1)
+    _add_subtree("root", "n", 0)
+    return info
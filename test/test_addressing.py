@@ -0,0 +1,68 @@
+#!/usr/bin/python
+import unittest
+
+from wwplan import addressing
+
+class AddressingTest(unittest.TestCase):
+    def test_ip_to_int(self):
+        self.assertEqual(addressing.ip_to_int("10.0.1.2"), (10 << 24) + 258)
+        self.assertEqual(addressing.int_to_ip((10 << 24) + 258), "10.0.1.2")
+        self.assertEqual(addressing.get_netmask(22), "255.255.252.0")
+
+    def test_get_prefix_length(self):
+        self.assertEqual(addressing.get_prefix_length(1), 30)
+        self.assertEqual(addressing.get_prefix_length(2), 30)
+        self.assertEqual(addressing.get_prefix_length(3), 29)
+        self.assertEqual(addressing.get_prefix_length(254), 24)
+        self.assertEqual(addressing.get_prefix_length(255), 23)
+
+    def test_subnet_allocator(self):
+        allocator = addressing.SubnetAllocator("10.0.0.0", 24)
+        allocator.reserve("10.0.0.4", 30)
+        self.assertEqual(allocator.allocate(30), "10.0.0.0")
+        self.assertEqual(allocator.allocate(29), "10.0.0.8")
+        self.assertEqual(allocator.allocate(25), "10.0.0.128")
+        self.assertRaises(ValueError, allocator.allocate, 25)
+        self.assertRaises(ValueError, allocator.reserve, "10.0.0.128", 30)
+        self.assertRaises(ValueError, addressing.SubnetAllocator, "10.0.0.1", 24)
+
+    def test_allocate_subnets(self):
+        allocator = addressing.SubnetAllocator(*addressing.DEFAULT_BASE_NETWORK)
+        networks = [("net%d" % index, ["h%d" % host for host in range(index % 7 + 1)])
+            for index in range(5000)]
+        subnets = addressing.allocate_subnets(allocator, networks)
+        self.assertEqual(subnets["net0"], dict(network="10.0.133.224", prefix=30,
+            addresses={"h0": "10.0.133.225"}))
+        addresses = [address for subnet in subnets.itervalues()
+            for address in subnet["addresses"].itervalues()]
+        self.assertEqual(len(set(addresses)), len(addresses))
+        for subnet in subnets.itervalues():
+            start = addressing.ip_to_int(subnet["network"])
+            self.assertEqual(start % (1 << (32 - subnet["prefix"])), 0)
+
+    def test_get_host_base(self):
+        subnet = addressing.create_subnet("10.0.0.8", 29, ["sta1", "sta2", "ap"])
+        self.assertEqual(addressing.get_host_base(subnet, ["sta1", "sta2"]), "0.0.0.1")
+        self.assertEqual(addressing.get_host_base(subnet, ["ap"]), "0.0.0.3")
+        self.assertEqual(addressing.get_host_base(subnet, ["sta1", "ap"]), None)
+        self.assertEqual(addressing.get_host_base(subnet, ["sta2", "sta1"]), None)
+
+    def test_address_index(self):
+        index = addressing.AddressIndex([
+            ("10.0.0.1", dict(node_name="ap1", device_name="net1-wifi1")),
+            ("10.0.0.2", dict(node_name="sta1", device_name="net1-wifi1")),
+        ])
+        self.assertEqual(len(index), 2)
+        self.assertEqual(index["10.0.0.2"],
+            dict(node_name="sta1", device_name="net1-wifi1", address="10.0.0.2"))
+        class Ipv4Address(object):
+            def __init__(self, address):
+                self.value = addressing.ip_to_int(address)
+            def Get(self):
+                return self.value
+        infos = index.resolve([Ipv4Address("10.0.0.2"), "10.0.0.1"])
+        self.assertEqual([info["node_name"] for info in infos], ["sta1", "ap1"])
+        self.assertRaises(KeyError, index.resolve, ["10.0.0.3"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+#!/usr/bin/python
+import unittest
+import os
+import shutil
+import tempfile
+from StringIO import StringIO
+
+from wwplan import netinfo
+from wwplan import batch_netinfo
+
+class BatchNetinfoTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _get_report_file(self):
+        filename = "josjo.report.txt"
+        return os.path.join(os.path.dirname(__file__), filename)
+
+    def test_get_netinfo_filename(self):
+        f = batch_netinfo.get_netinfo_filename
+        self.assertEqual(f("/path/josjo.report.txt"), "/path/josjo.netinfo.yml")
+        self.assertEqual(f("/path/plan.txt", "/out"), "/out/plan.netinfo.yml")
+
+    def test_get_report_filenames(self):
+        path = self._get_report_file()
+        filenames = batch_netinfo.get_report_filenames([os.path.dirname(path)])
+        self.assertEqual(filenames, [path])
+
+    def test_main(self):
+        path = self._get_report_file()
+        for index in range(3):
+            shutil.copy(path, os.path.join(self.directory, "plan%d.report.txt" % index))
+        open(os.path.join(self.directory, "broken.report.txt"), "w").write("broken")
+        stream, error_stream = StringIO(), StringIO()
+        retcode = batch_netinfo.main([self.directory, "-j", "2"],
+            stream=stream, error_stream=error_stream)
+        self.assertEqual(retcode, 1)
+        self.assertEqual(len(stream.getvalue().splitlines()), 3)
+        self.assert_(error_stream.getvalue().startswith(
+            os.path.join(self.directory, "broken.report.txt") + ": error"))
+        expected = netinfo.get_netinfo_from_report_file(path)
+        output = os.path.join(self.directory, "plan1.netinfo.yml")
+        self.assertEqual(netinfo.load_yaml_file(output), expected)
+
+if __name__ == '__main__':
+    unittest.main()
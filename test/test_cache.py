@@ -0,0 +1,72 @@
+#!/usr/bin/python
+import unittest
+import os
+import shutil
+import tempfile
+
+from wwplan import cache
+from wwplan import netinfo
+
+class CacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.old_config = dict(cache.config)
+        cache.configure(self.directory)
+        self.calls = []
+
+    def tearDown(self):
+        cache.config.update(self.old_config)
+        shutil.rmtree(self.directory)
+
+    def _get_report_file(self):
+        filename = "josjo.report.txt"
+        return os.path.join(os.path.dirname(__file__), filename)
+
+    def _parse(self, filename):
+        self.calls.append(filename)
+        return {"filename": filename, "size": os.path.getsize(filename)}
+
+    def test_load(self):
+        path = self._get_report_file()
+        obj1 = cache.load("test", path, self._parse, 1)
+        obj2 = cache.load("test", path, self._parse, 1)
+        self.assertEqual(obj1, obj2)
+        self.assertEqual(len(self.calls), 1)
+        cache.load("test", path, self._parse, 2)
+        self.assertEqual(len(self.calls), 2)
+
+    def test_load_corrupt_entry(self):
+        path = self._get_report_file()
+        entry_path = cache.get_entry_path(self.directory, "test", 1, cache.get_file_hash(path))
+        # Memo get of a missing key (KeyError), then a truncated tuple (IndexError)
+        for contents in ["g0\n.", "t."]:
+            open(entry_path, "wb").write(contents)
+            cache.load("test", path, self._parse, 1)
+        self.assertEqual(len(self.calls), 2)
+
+    def test_load_disabled(self):
+        cache.configure(None)
+        path = self._get_report_file()
+        cache.load("test", path, self._parse, 1)
+        cache.load("test", path, self._parse, 1)
+        self.assertEqual(len(self.calls), 2)
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_evict(self):
+        for index in range(3):
+            path = os.path.join(self.directory, "entry%d.pickle" % index)
+            open(path, "w").write("x" * 100)
+            os.utime(path, (index, index))
+        cache.evict(self.directory, 250)
+        self.assertEqual(sorted(os.listdir(self.directory)),
+            ["entry1.pickle", "entry2.pickle"])
+
+    def test_get_netinfo_from_report_file(self):
+        path = self._get_report_file()
+        info1 = netinfo.get_netinfo_from_report_file(path)
+        info2 = netinfo.get_netinfo_from_report_file(path)
+        self.assertEqual(info1, info2)
+        self.assertEqual(len(os.listdir(self.directory)), 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+#!/usr/bin/python
+import unittest
+import os
+from StringIO import StringIO
+
+from wwplan import netinfo
+from wwplan import capacity
+import netinfos
+
+class CapacityTest(unittest.TestCase):
+    def setUp(self):
+        filename = os.path.join(os.path.dirname(__file__), "josjo.netinfo.yml")
+        self.netinfo = netinfo.load_yaml_file(filename)
+
+    def _get_siminfo_file(self):
+        return os.path.join(os.path.dirname(__file__), "udp_echo.siminfo.yml")
+
+    def test_parse_data_rate(self):
+        self.assertEqual(capacity.parse_data_rate("1Mbps"), 1e6)
+        self.assertEqual(capacity.parse_data_rate("0.5Mb/s"), 5e5)
+        self.assertEqual(capacity.parse_data_rate("10KBps"), 8e4)
+        self.assertEqual(capacity.parse_data_rate(2000), 2000)
+        self.assertRaises(ValueError, capacity.parse_data_rate, "fast")
+
+    def test_get_wifi_airtime(self):
+        # 802.11a 54Mbps, 1500 bytes: DIFS 34 + backoff 67.5 + DATA 248 + SIFS 16 + ACK 44 (us)
+        airtime = capacity.get_wifi_airtime("wifia-54mbs", 1500 - 64 + 28 + 8, 0)
+        self.assertAlmostEqual(airtime * 1e6, 409.5, 1)
+        self.assert_(capacity.get_wifi_airtime("wifib-1mbs", 1024, 30000) > 
+            capacity.get_wifi_airtime("wifib-1mbs", 1024, 0))
+        self.assertRaises(ValueError, capacity.get_wifi_airtime, "wifiz-1mbs", 1024, 0)
+
+    def test_get_wimax_airtime(self):
+        self.assert_(capacity.get_wimax_airtime("QAM64_34", 1024) < 
+            capacity.get_wimax_airtime("BPSK_12", 1024))
+        self.assertRaises(ValueError, capacity.get_wimax_airtime, "QAM1024", 1024)
+
+    def test_estimate_siminfo_file(self):
+        estimate = capacity.estimate_siminfo_file(self._get_siminfo_file())
+        self.assertEqual([(flow["source"], flow["destination"]) for flow in estimate.flows],
+            [("Urcos", "Ccatcca"), ("Ccatcca", "Urcos")])
+        self.assertEqual(estimate.flows[0]["path"], 
+            ["Huiracochan", "Josjo1", "Josjo1-Josjo2", "Josjo2"])
+        # 2 packets of 1024 bytes in the 8 seconds from start to stop
+        self.assertEqual(estimate.flows[0]["throughput"], 2048.0)
+        self.assert_(0 < estimate.networks["Huiracochan"]["utilization"] < 0.05)
+        stream = StringIO()
+        capacity.print_estimate(estimate, stream)
+        self.assertEqual(len(stream.getvalue().splitlines()), 6)
+
+    def test_estimate_capacity_saturated(self):
+        apps = [dict(type="onoff", client_node="Urcos", server_node="Huiracochan",
+            rate="2Mbps", start=1.0, stop=9.0)]
+        estimate = capacity.estimate_capacity(self.netinfo, apps)
+        flow, = estimate.flows
+        self.assertEqual(flow["path"], ["Huiracochan"])
+        utilization = estimate.networks["Huiracochan"]["utilization"]
+        self.assert_(utilization > 2)
+        self.assertAlmostEqual(flow["throughput"], 2e6 / utilization)
+
+    def test_get_app_errors(self):
+        app = dict(type="onoff", client_node="Urcos", server_node="Huiracochan",
+            rate="2Mbps", packet_size=512)
+        self.assertEqual(list(capacity.get_app_errors(app)), [])
+        app.update(rate="fast", packet_size=0, ontime=0, offtime=0)
+        del app["client_node"]
+        self.assertEqual(len(list(capacity.get_app_errors(app))), 4)
+        app = dict(type="udp_echo", client_node="Urcos", server_node="Ccatcca", interval=0,
+            packets=-1, start=9.0, stop=1.0)
+        self.assertEqual(len(list(capacity.get_app_errors(app))), 3)
+
+    def test_get_app_flows_udp_echo(self):
+        app = dict(type="udp_echo", client_node="Urcos", server_node="Ccatcca",
+            interval=0.5, start=1.0, stop=9.0, packets=100)
+        self.assertEqual([bps for (_, _, bps, _) in capacity.get_app_flows(app)],
+            [8.0 * 1024 / 0.5] * 2)
+        app["packets"] = 4
+        self.assertEqual([bps for (_, _, bps, _) in capacity.get_app_flows(app)],
+            [8.0 * 1024 * 4 / 8.0] * 2)
+
+    def test_estimate_capacity_static_routing(self):
+        apps = [dict(type="udp_echo", client_node="Urcos", server_node="Ccatcca",
+            server_device="Josjo2-wimax2", start=1.0, stop=9.0)]
+        estimate = capacity.estimate_capacity(self.netinfo, apps, routing_mode="static")
+        self.assertEqual(estimate.flows[0]["path"], 
+            ["Huiracochan", "Josjo1", "Josjo1-Josjo2", "Josjo2"])
+        self.assertEqual(estimate.flows[1]["path"], estimate.flows[0]["path"][::-1])
+        self.assertRaises(ValueError, capacity.estimate_capacity, self.netinfo, apps,
+            routing_mode="ospf")
+
+    def test_estimate_capacity_large_plan(self):
+        # 1001 networks: a root AP with 100 districts, each one with 9 networks
+        info = netinfos.create_tree_netinfo([100, 9, 3])
+        apps = [dict(type="onoff", client_node="n%d-0-0" % index, 
+            server_node="n%d-1-2" % (99 - index), rate="100Kbps")
+            for index in range(20)]
+        estimate = capacity.estimate_capacity(info, apps)
+        self.assertEqual(len(estimate.flows), 20)
+        self.assertEqual(estimate.flows[0]["path"], 
+            ["n0-0", "n0", "root", "n99", "n99-1"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+#!/usr/bin/python
+import unittest
+
+from wwplan import lib
+from wwplan import flowstats
+
+class FlowStatsTest(unittest.TestCase):
+    def _get_counters(self, index):
+        return [1000 * index, 1100 * index, index, index + 1, 0, 10**9 * index]
+    
+    def _create_series(self, nsamples, max_samples=None, delta=False):
+        series = flowstats.FlowSeries(max_samples, delta)
+        for index in range(nsamples):
+            series.append(0.1 * index, self._get_counters(index))
+        return series
+        
+    def test_flow_series(self):
+        for delta in [False, True]:
+            series = self._create_series(100, delta=delta)
+            self.assertEqual(len(series), 100)
+            self.assertEqual(series.get_times()[-1], 0.1 * 99)
+            self.assertEqual(series.get_values().tolist(), 
+                [self._get_counters(index) for index in range(100)])
+            self.assertEqual(series.get_counter("rxBytes")[-1], 99000)
+
+    def test_flow_series_with_max_samples(self):
+        for delta in [False, True]:
+            series = self._create_series(25, max_samples=10, delta=delta)
+            self.assertEqual(len(series), 10)
+            self.assertEqual(len(series.times), 10)
+            self.assertEqual(series.get_values().tolist(), 
+                [self._get_counters(index) for index in range(15, 25)])
+            self.assertAlmostEqual(series.get_times()[0], 1.5)
+
+    def test_flow_series_delta_overflow(self):
+        series = self._create_series(5, delta=True)
+        self.assertEqual(series.values.dtype.itemsize, 4)
+        series.append(1.0, [0, 0, 0, 0, 0, 2**40])
+        self.assertEqual(series.get_counter("delaySum")[-1], 2**40)
+        self.assertEqual(series.get_counter("delaySum")[-2], 4 * 10**9)
+        
+    def test_flow_samples(self):
+        samples = flowstats.FlowSamples(max_samples=5)
+        flow_stats = lib.Struct("FlowStats", rxBytes=10, txBytes=20, rxPackets=1, 
+            txPackets=2, lostPackets=0, delaySum=lib.Struct("Time", 
+                GetNanoSeconds=lambda: 500))
+        samples.add(0.1, [(1, flow_stats), (2, flow_stats)])
+        samples.add(0.2, [(1, flow_stats)])
+        self.assertEqual(sorted(samples), [1, 2])
+        self.assertEqual(len(samples[1]), 2)
+        self.assertEqual(samples[2].get_values().tolist(), [[10, 20, 1, 2, 0, 500]])
+        self.assertEqual(samples[1].get_nbytes(), 5 * 8 + 5 * 6 * 8)
+
+    def test_flow_series_with_resolution(self):
+        series = flowstats.FlowSeries(resolution=0.1)
+        for index in range(4):
+            series.append(1.0 * index, self._get_counters(10 * index))
+        self.assertEqual(len(series), 31)
+        self.assertAlmostEqual(series.get_times()[-1], 3.0)
+        self.assertEqual(series.get_values().tolist(), 
+            [self._get_counters(index) for index in range(31)])
+        self.assertEqual(series.count, 4)
+        measured = series.get_measured()
+        self.assertEqual(measured.sum(), 4)
+        self.assertEqual([index for (index, x) in enumerate(measured) if x], [0, 10, 20, 30])
+        times, throughputs = flowstats.get_throughput(series, measured=True)
+        self.assertEqual(times.tolist(), [1.0, 2.0, 3.0])
+        self.assertEqual([round(x) for x in throughputs], [80000] * 3)
+
+    def test_get_throughput(self):
+        series = self._create_series(11)
+        times, throughputs = flowstats.get_throughput(series)
+        self.assertEqual(len(times), 10)
+        self.assertAlmostEqual(times[-1], 1.0)
+        self.assertEqual([round(x) for x in throughputs], [80000] * 10)
+        times, throughputs = flowstats.get_throughput(series, "txBytes")
+        self.assertAlmostEqual(throughputs[0], 88000)
+
+    def test_get_loss_rate_and_mean_delay(self):
+        series = flowstats.FlowSeries()
+        for time, (tx, lost, rx, delay) in enumerate([(0, 0, 0, 0), (10, 1, 9, 9e9),
+                (10, 1, 9, 9e9), (30, 6, 24, 12e9)]):
+            series.append(time, [0, 0, rx, tx, lost, delay])
+        times, loss_rates = flowstats.get_loss_rate(series)
+        self.assertEqual(times.tolist(), [1, 2, 3])
+        self.assertEqual(loss_rates.tolist(), [0.1, 0.0, 0.25])
+        times, delays = flowstats.get_mean_delay(series)
+        self.assertEqual(delays.tolist(), [1.0, 0.0, 0.2])
+
+    def test_get_moving_average(self):
+        values = [1, 2, 3, 4, 5]
+        self.assertEqual(flowstats.get_moving_average(values, 2).tolist(), 
+            [1.5, 2.5, 3.5, 4.5])
+        self.assertEqual(flowstats.get_moving_average(values, 6).tolist(), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,6 +3,20 @@ import unittest
 from wwplan import lib
 
 class TestLibrary(unittest.TestCase):
+    def test_record(self):
+        class Point(lib.Record):
+            __slots__ = ("x", "y")
+            _aliases = {"x(+)": "x"}
+        point = Point(y=2, **{"x(+)": 1})
+        self.assertEqual((point.x, point.y), (1, 2))
+        self.assertEqual(getattr(point, "x(+)"), 1)
+        self.assertEqual(Point(x=1).y, None)
+        self.assertEqual(point._asdict(), {"x": 1, "y": 2})
+        self.assertEqual(repr(point), "<Point> [('x', 1), ('y', 2)]")
+        self.assertRaises(AttributeError, Point, z=3)
+        self.assertRaises(AttributeError, getattr, point, "z")
+        self.assertFalse(hasattr(point, "__dict__"))
+        
     def test_first(self):
         it = (x for x in range(10))
         self.assertEqual(lib.first(it), 0)
@@ -28,6 +42,9 @@ class TestLibrary(unittest.TestCase):
         lst = [1, 0, 0, 2, 3, 4, 0, 5, 0, 0, 6, 7]
         self.assertEqual(list(lib.split_iter_of_consecutive(lst, lambda x: x == 0, 2)),
             [[1], [2, 3, 4, 0, 5], [6, 7]])
+        it = iter([0, 0, 1, 2, 0, 0, 0, 3, 0])
+        self.assertEqual(list(lib.split_iter_of_consecutive(it, lambda x: x == 0, 2)),
+            [[], [1, 2], [3, 0]])
             
     def test_split_iter(self):
         lst = [1, 0, 0, 0, 2, 3, 4, 0, 5, 0, 0, 6, 7]
@@ -70,6 +87,21 @@ class TestLibrary(unittest.TestCase):
         self.assertEqual(res[0], {"header1": "val1a", "header2": "val2a", "header3": "val3a"})
         self.assertEqual(res[1], {"header1": "val1b", "header2": "val2b", "header3": "val3b"})
 
+    def test_parse_table_tuples(self):
+        table = ["header 1  header2", "val1a     val2a", "", "val1b     val2b"]
+        res = list(lib.parse_table(table, ["header 1", "header2"], row_type="tuple"))
+        self.assertEqual(res, [("val1a", "val2a"), ("val1b", "val2b")])
+        res = list(lib.parse_table(table, ["header 1", "header2"], row_type="namedtuple"))
+        self.assertEqual(res[1].header_1, "val1b")
+        self.assertEqual(res[1].header2, "val2b")
+        self.assertRaises(ValueError, lib.parse_table, table, ["header2"], row_type="list")
+
+    def test_compile_table_header(self):
+        keys, decode_row = lib.compile_table_header("A.  B  C:", ["A.", "B", "C:"])
+        self.assertEqual(keys, ("a", "b", "c"))
+        self.assertEqual(decode_row("1   2  3"), ("1", "2", "3"))
+        self.assertEqual(decode_row("1"), ("1", "", ""))
+
             
 if __name__ == '__main__':
     unittest.main()
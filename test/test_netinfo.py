@@ -37,20 +37,46 @@ class Ns3RadioMobileTest(unittest.TestCase):
 
         josjo1 = info["networks"]["Josjo1"]
         self.assertEqual(josjo1["mode"], {'standard': 'wifi', 'wifi_mode': 'wifia-6mbs'})
-        self.assertEqual(josjo1["node"], {'name': 'Josjojauarina 1', 'system': 'wifi1'})
+        radio = {'tx_power': 40.0, 'loss': 0.5, 'rx_threshold': -107.0, 'antenna_gain': 2.0}
+        self.assertEqual(josjo1["node"], 
+            {'name': 'Josjojauarina 1', 'system': 'wifi1', 'radio': radio})
         self.assertEqual(josjo1["terminals"][0], 
-            {'name': 'Urpay', 'system': 'wifi1'})
+            {'name': 'Urpay', 'system': 'wifi1', 'radio': radio})
         self.assertEqual(josjo1["terminals"][1], 
-            {'name': 'Huiracochan', 'system': 'wifi1'})
+            {'name': 'Huiracochan', 'system': 'wifi1', 'radio': radio})
+        # Report qualities are resend counts: no path losses
+        self.assert_("links" not in josjo1)
         
         josjo2 = info["networks"]["Josjo2"]
         self.assertEqual(josjo2["mode"], {'standard': 'wimax', 'wimax_scheduler': 'rtps'})
-        self.assertEqual(josjo2["node"], {'name': 'Josjojauarina 2', 'system': 'wimax1', 'wimax_mode': 'all'})
-        self.assertEqual(josjo2["terminals"][0], 
-            {'name': 'Ccatcca', 'system': 'wimax2', 'wimax_mode': 'QAM64_34'})
-        self.assertEqual(josjo2["terminals"][1], 
-            {'name': 'Kcauri', 'system': 'wimax2', 'wimax_mode': 'QAM64_34'})
+        self.assertEqual(josjo2["node"], {'name': 'Josjojauarina 2', 'system': 'wimax1', 
+            'wimax_mode': 'all', 'radio': radio})
+        self.assertEqual(josjo2["terminals"][0], {'name': 'Ccatcca', 'system': 'wimax2', 
+            'wimax_mode': 'QAM64_34', 'radio': radio})
+        self.assertEqual(josjo2["terminals"][1], {'name': 'Kcauri', 'system': 'wimax2', 
+            'wimax_mode': 'QAM64_34', 'radio': radio})
 
+    def test_load_yaml_file(self):
+        path = os.path.join(os.path.dirname(__file__), "josjo.netinfo.yml")
+        info = netinfo.load_yaml_file(path)
+        self.assertEqual(info["units"]["Urcos"]["location"], [2533, -19694])
+        self.assertEqual(netinfo.load_yaml(netinfo.dump_yaml(info)), info)
+        
+    def test_validate_netinfo(self):
+        path = os.path.join(os.path.dirname(__file__), "josjo.netinfo.yml")
+        info = netinfo.load_yaml_file(path)
+        netinfo.validate_netinfo(info)
+        info["units"]["Urcos"]["location"] = [1]
+        del info["networks"]["Josjo1"]["mode"]["wifi_mode"]
+        info["networks"]["Josjo2"]["terminals"][0]["name"] = "Unknown"
+        info["networks"]["Josjo1"]["node"]["radio"] = {"tx_power": 40.0}
+        info["networks"]["Huiracochan"]["links"] = [
+            {"peers": ["Huiracochan", "Urcos"], "loss": 90.0}]
+        errors = list(netinfo.get_netinfo_errors(info))
+        self.assertEqual(len(errors), 5)
+        self.assertRaises(ValueError, netinfo.validate_netinfo, info)
+        self.assertRaises(ValueError, netinfo.validate_netinfo, [])
+        
     def test_main(self):
         path = self._get_report_file()
         stream = StringIO()
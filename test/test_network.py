@@ -4,9 +4,10 @@ import unittest
 import os
 from StringIO import StringIO
 
-import ns3
+from wwplan.ns3_module import ns3
 from wwplan import lib
 from wwplan import radiomobile
+from wwplan import spatial
 from wwplan import network as wwnetwork
 
 class Ns3RadioMobileTest(unittest.TestCase):
@@ -22,6 +23,30 @@ class Ns3RadioMobileTest(unittest.TestCase):
         max_distance = wwnetwork.get_max_distance_in_network(nodes, "node1", ["node2", "node3"])
         self.assertEqual(max_distance, 5.0)
 
+    def test_get_nearest_ap(self):
+        index = spatial.SpatialIndex([("ap1", (0, 0)), ("ap2", (100, 0)), ("sta", (70, 0))])
+        network = lib.Struct("network_mock", spatial_index=index, 
+            ap_index=index.subset(["ap1", "ap2"]))
+        self.assertEqual(wwnetwork.get_nearest_ap(network, "sta"), ("ap2", 30.0))
+        self.assertEqual(wwnetwork.get_nearest_ap(network, "ap1"), ("ap2", 100.0))
+        self.assertEqual(wwnetwork.get_nearest_ap(network, (10, 0)), ("ap1", 10.0))
+
+    def test_get_received_power(self):
+        report = radiomobile.parse_report(self._get_report_file())
+        net = report.nets["Josjo1 [wifia-6mbs]"]
+        net = lib.Struct("Network", net_members=net.net_members, links=net.links,
+            quality_legend="Quality = Rx level relative to Rx threshold (dB)")
+        budgets = radiomobile.get_member_budgets(net, report.systems)
+        (peers, loss), = [(peers, loss) for (peers, loss) in 
+            radiomobile.get_net_link_losses(net, report.systems) if "Huiracochan" in peers]
+        link, = [link for link in net.links if "Huiracochan" in link.peers]
+        tx_budget, rx_budget = [budgets[peer] for peer in peers]
+        self.assertEqual(wwnetwork.get_received_power(loss, tx_budget, rx_budget),
+            rx_budget["rx_threshold"] + link.quality)
+        attributes = wwnetwork.get_wifi_phy_attributes(rx_budget)
+        self.assertEqual(attributes["EnergyDetectionThreshold"], -107.0)
+        self.assertEqual(attributes["TxPowerStart"], 39.5)
+
     def test_create_network_from_report_file(self):
         path = self._get_report_file()
         network = wwnetwork.create_network_from_report_file(path)
@@ -29,6 +54,8 @@ class Ns3RadioMobileTest(unittest.TestCase):
         self.assertEqual(josjo2.name, "Josjojauarina 2")
         self.assert_(isinstance(josjo2.ns3_node, ns3.Node))         
         self.assertEqual(josjo2.location, [21728, 5837])
+        self.assertEqual(sorted(network.spatial_index.within("Josjojauarina 2", 16000)),
+            ["Ccatcca", "Josjojauarina 2", "Kcauri"])
         
         self.assertEqual(set(josjo2.devices.keys()), 
             set(["Josjo1-Josjo2-wifi2", "Josjo2-wimax1"]))
@@ -6,7 +6,7 @@ import tempfile
 import re
 from StringIO import StringIO
 
-import ns3
+from wwplan.ns3_module import ns3
 from wwplan import radiomobile
 from wwplan import ns3_lib
 
@@ -47,24 +47,23 @@ class Ns3RadioMobileTest(unittest.TestCase):
             return monitor_info
             
         expected_debug = """
-Sent 1024 bytes to 10.1.3.1
-Received 1024 bytes from 10.1.0.1
-Received 1024 bytes from 10.1.3.1
-Sent 1024 bytes to 10.1.3.1
-Received 1024 bytes from 10.1.0.1
-Received 1024 bytes from 10.1.3.1""".strip()
+Sent 1024 bytes to 10.0.0.9
+Received 1024 bytes from 10.0.0.17
+Received 1024 bytes from 10.0.0.9
+Sent 1024 bytes to 10.0.0.9
+Received 1024 bytes from 10.0.0.17
+Received 1024 bytes from 10.0.0.9""".strip()
         path = self._get_report_file()
         debug_data, monitor_info = capture_stderr(ns3_lib.simulation_main, 
             [path], simulation, "UDP server/client")
         self.assertEqual(debug_data.strip(), expected_debug)
         
         # Check monitor_info
-        self.assertEqual(monitor_info["flow_stats_steps"].keys(), [1, 2])
-        steps = monitor_info["flow_stats_steps"][1]
-        time1, flow_stats1 = steps[0]
-        time2, flow_stats2 = steps[1]
+        self.assertEqual(monitor_info["flow_samples"].keys(), [1, 2])
+        series = monitor_info["flow_samples"][1]
+        time1, time2 = series.get_times()[:2]
         self.assert_((time2-time1) - 0.1 < 0.01)
-        self.assertEqual(len(steps), int((5.0 - 1.0) / 0.1) - 1)
+        self.assertEqual(len(series), int((5.0 - 1.0) / 0.1) - 1)
         
         # Check print_monitor
         
@@ -72,8 +71,8 @@ Received 1024 bytes from 10.1.3.1""".strip()
         ns3_lib.print_monitor_results(monitor_info, show_histograms=True, stream=stream)
         results = stream.getvalue()        
          
-        re_flow1 = r"^Flow 1 \(UDP\) - 10.1.0.1/\d+ \(Urcos:Huiracochan-wifi1\) --> 10.1.3.1/9 \(Ccatcca:Josjo2-wimax2\)"
-        re_flow2 = r"^Flow 2 \(UDP\) - 10.1.3.1/9 \(Ccatcca:Josjo2-wimax2\) --> 10.1.0.1/\d+ \(Urcos:Huiracochan-wifi1\)"
+        re_flow1 = r"^Flow 1 \(UDP\) - 10.0.0.17/\d+ \(Urcos:Huiracochan-wifi1\) --> 10.0.0.9/9 \(Ccatcca:Josjo2-wimax2\)"
+        re_flow2 = r"^Flow 2 \(UDP\) - 10.0.0.9/9 \(Ccatcca:Josjo2-wimax2\) --> 10.0.0.17/\d+ \(Urcos:Huiracochan-wifi1\)"
         self.assert_(re.search(re_flow1, results, re.M))
         self.assert_(re.search(re_flow2, results, re.M))       
         
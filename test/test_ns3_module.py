@@ -0,0 +1,56 @@
+#!/usr/bin/python
+import unittest
+import os
+import sys
+import types
+import subprocess
+
+from wwplan import ns3_module
+from wwplan import network as wwnetwork
+
+def create_ns3_stand_in(calls):
+    """Return a stand-in ns3 module that records the calls of the mobility helpers."""
+    ns3 = types.ModuleType("ns3")
+    class Recorder(object):
+        def __init__(self, *args):
+            calls.append((self.__class__.__name__, args))
+        def __getattr__(self, name):
+            def _method(*args):
+                calls.append((name, tuple((arg.__class__.__name__ 
+                    if isinstance(arg, Recorder) else arg) for arg in args)))
+            return _method
+    for name in ["Vector", "ListPositionAllocator", "MobilityHelper"]:
+        setattr(ns3, name, type(name, (Recorder,), {}))
+    return ns3
+
+class Ns3ModuleTest(unittest.TestCase):
+    def tearDown(self):
+        ns3_module.set_ns3(None)
+
+    def test_lazy_import(self):
+        code = ("import sys; import wwplan.network, wwplan.ns3_lib, wwplan.run_siminfo; " + 
+            "from wwplan import ns3_module; " + 
+            "print ns3_module.is_loaded(), 'ns3' in sys.modules")
+        root = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+        env = dict(os.environ, PYTHONPATH=root)
+        output = subprocess.Popen([sys.executable, "-c", code], env=env,
+            stdout=subprocess.PIPE).communicate()[0]
+        self.assertEqual(output.strip(), "False False")
+
+    def test_set_ns3(self):
+        calls = []
+        ns3_module.set_ns3(create_ns3_stand_in(calls))
+        self.assert_(ns3_module.is_loaded())
+        wwnetwork.install_mobility("container", [(1, 2), (3, 4)])
+        self.assertEqual(calls, [
+            ("ListPositionAllocator", ()),
+            ("Vector", (1, 2, 0)), ("Add", ("Vector",)),
+            ("Vector", (3, 4, 0)), ("Add", ("Vector",)),
+            ("MobilityHelper", ()),
+            ("SetMobilityModel", ("ns3::ConstantPositionMobilityModel",)),
+            ("SetPositionAllocator", ("ListPositionAllocator",)),
+            ("Install", ("container",)),
+        ])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -28,10 +28,23 @@ class TestLibrary(unittest.TestCase):
     def test_keys(self):
         self.assertEqual(self.odict.keys(), ["key1", "key2"])
         
+    def test_delitem_keeps_order(self):
+        self.odict["key3"] = "value3"
+        del self.odict["key2"]
+        self.odict["key2"] = "value2"
+        self.assertEqual(self.odict.keys(), ["key1", "key3", "key2"])
+        self.assertEqual(self.odict.values(), ["value1", "value3", "value2"])
+
+    def test_repr_format(self):
+        self.assertEqual(repr(self.odict), 
+            "OrderedDict([('key1', 'value1'), ('key2', 'value2')])")
+        
     def test_copy(self):
         odict2 = self.odict.copy()
         self.odict["key1"] = "value11"
         self.assertEqual(odict2["key1"], "value1")
+        self.assertTrue(isinstance(odict2, odict.odict))
+        self.assertEqual(odict2.keys(), ["key1", "key2"])
     
 if __name__ == '__main__':
     unittest.main()#
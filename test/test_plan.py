@@ -0,0 +1,62 @@
+#!/usr/bin/python
+import unittest
+import os
+import copy
+
+from wwplan import netinfo
+from wwplan import plan
+from wwplan import odict
+
+class PlanTest(unittest.TestCase):
+    def setUp(self):
+        filename = os.path.join(os.path.dirname(__file__), "josjo.netinfo.yml")
+        self.netinfo = netinfo.load_yaml_file(filename)
+
+    def test_create_plan(self):
+        plan1 = plan.create_plan(self.netinfo)
+        networks = self.netinfo["networks"]
+        self.assertEqual(sorted(plan1["networks"]), sorted(networks))
+        self.assertEqual([plan1["networks"][name]["net_index"] for name in sorted(networks)],
+            range(len(networks)))
+        # The plan does not depend on the order of the networks in the netinfo
+        reversed_netinfo = dict(self.netinfo, networks=odict.odict(
+            sorted(networks.iteritems(), reverse=True)))
+        self.assertEqual(plan.create_plan(reversed_netinfo), plan1)
+        for name, network_plan in plan1["networks"].iteritems():
+            self.assertEqual(network_plan["node"], networks[name]["node"]["name"])
+            self.assert_(network_plan["max_distance"] > 0)
+        self.assertEqual(plan1["networks"]["Josjo2"]["subnet"], dict(network="10.0.0.8",
+            prefix=29, addresses={"Ccatcca": "10.0.0.9", "Kcauri": "10.0.0.10",
+                "Josjojauarina 2": "10.0.0.11"}))
+
+    def test_create_plan_with_previous(self):
+        plan1 = plan.create_plan(self.netinfo)
+        netinfo2 = copy.deepcopy(self.netinfo)
+        del netinfo2["networks"]["Huiracochan"]
+        netinfo2["units"]["Urpay"]["location"] = [0, 0]
+        plan2 = plan.create_plan(netinfo2, previous=plan1)
+        for name in netinfo2["networks"]:
+            if name == "Josjo1":
+                self.assertNotEqual(plan2["networks"][name], plan1["networks"][name])
+                self.assertEqual(plan2["networks"][name]["net_index"], 0)
+                self.assertEqual(plan2["networks"][name]["subnet"]["network"], "10.0.0.0")
+            else:
+                self.assert_(plan2["networks"][name] is plan1["networks"][name])
+        self.assertEqual(plan2["networks"]["Josjo1"]["signature"], 
+            plan.get_network_signature(netinfo2["networks"]["Josjo1"], netinfo2["units"]))
+        self.assertEqual(plan.create_plan(netinfo2, previous=plan2), plan2)
+
+    def test_diff_netinfo(self):
+        netinfo2 = copy.deepcopy(self.netinfo)
+        name1, name2 = list(netinfo2["networks"])[:2]
+        netinfo2["networks"]["new"] = netinfo2["networks"].pop(name1)
+        netinfo2["networks"][name2]["mode"]["wifi_mode"] = "wifia-54mbs"
+        diff = plan.diff_netinfo(self.netinfo, netinfo2)
+        self.assertEqual(diff.added, ["new"])
+        self.assertEqual(diff.removed, [name1])
+        self.assertEqual(diff.changed, [name2])
+        self.assertEqual(diff.unchanged,
+            sorted(set(self.netinfo["networks"]) - set([name1, name2])))
+
+if __name__ == '__main__':
+    unittest.main()
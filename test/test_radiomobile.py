@@ -3,6 +3,7 @@ import os
 import unittest
 from datetime import datetime
 
+from wwplan import lib
 from wwplan import radiomobile
 
 class RadioMobileReportTest(unittest.TestCase):
@@ -20,6 +21,49 @@ class RadioMobileReportTest(unittest.TestCase):
         position2 = radiomobile.get_position_from_reference(unit2, reference)
         self.assertEqual(position2, (169469, 57747))
               
+    def test_get_positions_from_reference(self):
+        unit1 = (40.86, 0.16)
+        unit2 = (41.38, 2.17)
+        reference = radiomobile.get_reference(unit1)
+        positions = radiomobile.get_positions_from_reference([unit1, unit2], reference)
+        self.assertEqual(positions.tolist(), [[0, 0], [169469, 57747]])
+
+    def test_get_distances(self):
+        origins = [(40.86, 0.16), (-9.31, -75.14)]
+        destinations = [(41.38, 2.17), (-9.32, -75.29)]
+        distances = radiomobile.get_distances(origins, destinations)
+        expected = [radiomobile.get_distance(c1, c2) for (c1, c2) in 
+            zip(origins, destinations)]
+        self.assertEqual(distances.tolist(), expected)
+        
+    def test_get_net_links(self):
+        grid_field = "#  01 02 03"
+        rows = [
+            {"net_members": "n1", grid_field: "01    62 81"},
+            {"net_members": "n2", grid_field: "02 62      "},
+            {"net_members": "n3", grid_field: "03 81      "},
+        ]
+        # only location_coords are used, location strings are not parsed again
+        units = {
+            "n1": lib.Struct("unit", location_coords=[40.86, 0.16]),
+            "n2": lib.Struct("unit", location_coords=[41.38, 2.17]),
+            "n3": lib.Struct("unit", location_coords=[40.87, 0.16]),
+        }
+        links = list(radiomobile.get_net_links(rows, grid_field, units))
+        self.assertEqual([(l["node1"].net_members, l["node2"].net_members, l["quality"]) 
+            for l in links], [("n1", "n2", 62), ("n1", "n3", 81)])
+        self.assertEqual(links[0]["distance"], 
+            radiomobile.get_distance((40.86, 0.16), (41.38, 2.17)))
+        self.assertEqual(links[1]["distance"], 1111)
+
+    def test_iter_report_sections(self):
+        lines = ["Radio Mobile", "---", "Section 1", "---", "a", "b", "---", 
+                 "Section 2", "---", "c"]
+        sections = [(key, list(it)) for (key, it) in 
+            radiomobile.iter_report_sections(iter(lines))]
+        self.assertEqual(sections, [("header", ["Radio Mobile"]), 
+            ("section_1", ["a", "b"]), ("section_2", ["c"])])
+              
     #def test_generated_on(self):
     #    self.assertEqual(datetime(2010, 4, 29, 10, 29, 58), self.report.generated_on)
                       
@@ -78,6 +122,48 @@ class RadioMobileReportTest(unittest.TestCase):
         self.assertEqual("2,0m", member2.antenna) 
         self.assertEqual("Slave", member2.role)
 
+    def test_link_table(self):
+        filename = os.path.join(os.path.dirname(__file__), "josjo.report.txt")
+        report = radiomobile.parse_report(filename, link_table=True)
+        for net_name, net in report.nets.iteritems():
+            self.assert_(isinstance(net.links, radiomobile.LinkTable))
+            expected = [(l.peers, l.quality, l.distance) for l in self.report.nets[net_name].links]
+            self.assertEqual([(l.peers, l.quality, l.distance) for l in net.links], expected)
+        links = report.nets['Josjo1 [wifia-6mbs]'].links
+        self.assertEqual(len(links), 2)
+        self.assertEqual(links[1].peers, ('Josjojauarina 1', 'Huiracochan'))
+        self.assertEqual(links[1].quality, 81)
+        good_links = links.filter(min_quality=70)
+        self.assertEqual([l.peers for l in good_links], [('Josjojauarina 1', 'Huiracochan')])
+
+    def test_get_report_link_table(self):
+        table = radiomobile.get_report_link_table(self.report)
+        self.assertEqual(len(table), 6)
+        links = table[(table.distance < 16000) & (table.quality > 70)]
+        self.assertEqual([l.distance for l in links], [15666, 14181, 12892])
+        self.assertEqual([table.net_names[index] for index in links.nets],
+            ['Josjo2 [wimax-rtps]', 'Josjo1 [wifia-6mbs]', 'Huiracochan [wifib-1mbs]'])
+        
+    def test_parse_system_value(self):
+        self.assertEqual(radiomobile.parse_system_value("10,000W"), 10.0)
+        self.assertEqual(radiomobile.parse_system_value("-107,0dBm"), -107.0)
+        self.assertEqual(radiomobile.parse_system_value("2,0m"), 2.0)
+        self.assertRaises(ValueError, radiomobile.parse_system_value, "omni.ant")
+
+    def test_get_net_link_losses(self):
+        budget = radiomobile.get_system_budget(self.report.systems["wifi1"], 2.0)
+        self.assertEqual(budget, {"tx_power": 40.0, "loss": 0.5, 
+            "rx_threshold": -107.0, "antenna_gain": 2.0})
+        net = self.report.nets['Josjo1 [wifia-6mbs]']
+        # The report qualities are resend counts, not signal levels
+        self.assertEqual(net.quality_legend, "Quality = 50 - number of resend")
+        self.assertEqual(radiomobile.get_net_link_losses(net, self.report.systems), None)
+        net = lib.Struct("Network", net_members=net.net_members, links=net.links,
+            quality_legend="Quality = Rx level relative to Rx threshold (dB)")
+        losses = radiomobile.get_net_link_losses(net, self.report.systems)
+        self.assertEqual(losses, [(('Josjojauarina 1', 'Urpay'), 88.0),
+            (('Josjojauarina 1', 'Huiracochan'), 69.0)])
+        
     def test_get_units_for_network(self):
         net2 = self.report.nets.values()[1]
         self.assertEqual(['Josjojauarina 2'],
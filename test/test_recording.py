@@ -0,0 +1,52 @@
+#!/usr/bin/python
+import unittest
+import os
+
+from wwplan import recording
+from wwplan import network as wwnetwork
+import netinfos
+
+class RecordingBackendTest(unittest.TestCase):
+    def _get_netinfo_file(self):
+        return os.path.join(os.path.dirname(__file__), "josjo.netinfo.yml")
+
+    def test_create_network(self):
+        recorder = recording.RecordingBackend()
+        network = wwnetwork.create_network_from_yaml_file(self._get_netinfo_file(),
+            backend=recorder)
+        self.assertEqual(recorder.get_counts(), {"create_node": 7, "install_nodes": 1,
+            "wifi_network": 3, "wimax_network": 1, "populate_global_routes": 1})
+        calls = dict((kwargs["network"], kwargs) for (method, kwargs) in recorder.calls
+            if method in ("wifi_network", "wimax_network"))
+        self.assertEqual(calls["Josjo2"]["scheduler"], "rtps")
+        self.assertEqual(calls["Josjo1"]["mode"], "wifia-6mbs")
+        self.assertEqual(calls["Josjo1"]["terminals"], ["Urpay", "Huiracochan"])
+        ccatcca = network.nodes["Ccatcca"]
+        device = ccatcca.devices["Josjo2-wimax2"]
+        self.assertEqual(device.ns3_device.role, "terminal")
+        self.assertEqual(str(device.interfaces[0].address), "10.0.0.9")
+        self.assertEqual(network.ip2info["10.0.0.9"],
+            dict(device_name="Josjo2-wimax2", node_name="Ccatcca"))
+        self.assertEqual(network.address_index["10.0.0.9"]["node_name"], "Ccatcca")
+        self.assertEqual(len(network.address_index), len(network.ip2info))
+        self.assert_(network.backend is recorder)
+
+    def test_create_network_with_static_routing(self):
+        recorder = recording.RecordingBackend()
+        info = netinfos.create_star_netinfo(1000, 4)
+        network = wwnetwork.create_network(info, routing="static", backend=recorder)
+        counts = recorder.get_counts()
+        self.assertEqual(counts["create_node"], 5000)
+        self.assertEqual(counts["wifi_network"], 1000)
+        self.assertEqual(counts["install_static_routes"], 5000)
+        self.assertEqual(len(network.ip2info), 5000)
+        self.assertEqual(network.plan["networks"]["net999"]["subnet"]["prefix"], 29)
+
+    def test_create_network_with_unknown_standard(self):
+        info = netinfos.create_star_netinfo(1, 1)
+        info["networks"]["net0"]["mode"]["standard"] = "lte"
+        self.assertRaises(ValueError, wwnetwork.create_network, info, 
+            backend=recording.RecordingBackend())
+
+if __name__ == '__main__':
+    unittest.main()
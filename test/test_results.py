@@ -0,0 +1,63 @@
+#!/usr/bin/python
+import unittest
+import os
+import csv
+import shutil
+import tempfile
+
+import numpy
+from wwplan import flowstats
+from wwplan import results
+
+class ResultsTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.flows = [dict((name, index) for (index, name) in enumerate(results.FLOW_FIELDS))]
+        self.flows[0].update(flow_id=1, protocol="UDP", source_node="Urcos", 
+            destination_node="Ccatcca")
+        self.flow_samples = flowstats.FlowSamples()
+        for time in range(3):
+            self.flow_samples.setdefault(1, flowstats.FlowSeries()).append(time, 
+                [100 * time, 200 * time, time, 2 * time, 0, 10**9 * time])
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_get_series_columns(self):
+        columns = results.get_series_columns(self.flow_samples)
+        self.assertEqual(sorted(columns), sorted(results.SERIES_FIELDS))
+        self.assertEqual(columns["flow_id"].tolist(), [1, 1, 1])
+        self.assertEqual(columns["rx_bytes"].tolist(), [0, 100, 200])
+        self.assertEqual(columns["delay_sum"].tolist(), [0.0, 1.0, 2.0])
+        self.assertEqual(columns["measured"].tolist(), [1, 1, 1])
+        flow_samples = flowstats.FlowSamples(resolution=0.5)
+        for time in range(3):
+            flow_samples.setdefault(1, flowstats.FlowSeries(resolution=0.5)).append(time,
+                [100 * time, 0, 0, 0, 0, 0])
+        columns = results.get_series_columns(flow_samples)
+        self.assertEqual(columns["time"].tolist(), [0.0, 0.5, 1.0, 1.5, 2.0])
+        self.assertEqual(columns["measured"].tolist(), [1, 0, 1, 0, 1])
+
+    def test_save_csv(self):
+        filename = os.path.join(self.directory, "results.csv")
+        results.save_results(filename, self.flows, self.flow_samples)
+        rows = list(csv.DictReader(open(filename)))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual((rows[0]["source_node"], rows[0]["destination_node"]), 
+            ("Urcos", "Ccatcca"))
+        series_rows = list(csv.reader(open(results.get_series_filename(filename))))
+        self.assertEqual(series_rows[0], list(results.SERIES_FIELDS))
+        self.assertEqual(series_rows[2], ["1", "1.0", "1", "100", "200", "1", "2", "0", "1.0"])
+
+    def test_save_npz(self):
+        filename = os.path.join(self.directory, "results.npz")
+        results.save_results(filename, self.flows, self.flow_samples)
+        data = numpy.load(filename)
+        self.assertEqual(data["flow_source_node"].tolist(), ["Urcos"])
+        self.assertEqual(data["flow_rx_bytes"].tolist(), [11])
+        self.assertEqual(data["series_time"].tolist(), [0.0, 1.0, 2.0])
+        self.assertRaises(ValueError, results.save_results, 
+            os.path.join(self.directory, "results.xml"), self.flows)
+
+if __name__ == '__main__':
+    unittest.main()
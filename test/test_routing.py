@@ -0,0 +1,72 @@
+#!/usr/bin/python
+import unittest
+import os
+
+from wwplan import lib
+from wwplan import netinfo
+from wwplan import plan
+from wwplan import routing
+import netinfos
+
+class RoutingTest(unittest.TestCase):
+    def setUp(self):
+        filename = os.path.join(os.path.dirname(__file__), "josjo.netinfo.yml")
+        self.plan = plan.create_plan(netinfo.load_yaml_file(filename))
+        
+    def _get_address(self, net_name, name):
+        return self.plan["networks"][net_name]["subnet"]["addresses"][name]
+
+    def test_get_routes(self):
+        routes = routing.get_routes(self.plan)
+        # Urcos - Huiracochan - Josjojauarina 1 (root) - Josjojauarina 2 - Ccatcca
+        self.assertEqual([route._asdict() for route in routes["Urcos"]], [dict(
+            network="0.0.0.0", prefix=0, net_name="Huiracochan",
+            gateway=self._get_address("Huiracochan", "Huiracochan"))])
+        self.assertEqual([route._asdict() for route in routes["Josjojauarina 1"]], [
+            dict(network=self.plan["networks"][net_name]["subnet"]["network"],
+                prefix=self.plan["networks"][net_name]["subnet"]["prefix"],
+                gateway=self._get_address(via_net_name, gateway), net_name=via_net_name)
+            for (net_name, via_net_name, gateway) in [
+                ("Huiracochan", "Josjo1", "Huiracochan"),
+                ("Josjo2", "Josjo1-Josjo2", "Josjojauarina 2")]])
+        address = self._get_address("Huiracochan", "Urcos")
+        self.assertEqual(routing.lookup_route(routes["Ccatcca"], address).gateway,
+            self._get_address("Josjo2", "Josjojauarina 2"))
+        self.assertEqual(routing.lookup_route(routes["Josjojauarina 2"], address).gateway,
+            self._get_address("Josjo1-Josjo2", "Josjojauarina 1"))
+        
+    def test_get_routes_is_linear(self):
+        # Tree: root AP with ndistricts STAs, each one the AP of a network of 4 STAs
+        ndistricts = 200
+        info = netinfos.create_tree_netinfo([ndistricts, 4])
+        tree_plan = plan.create_plan(info)
+        routes = routing.get_routes(tree_plan)
+        # A default route for each unit but the root, root routes to district subnets
+        self.assertEqual(sum(len(node_routes) for node_routes in routes.itervalues()),
+            (len(info["units"]) - 1) + ndistricts)
+        self.assertEqual(len(routes["root"]), ndistricts)
+        self.assertEqual(len(routes["n3-1"]), 1)
+        path = routing.get_path(tree_plan, routes, "n3-1", 
+            tree_plan["networks"]["n7"]["subnet"]["addresses"]["n7-2"])
+        self.assertEqual([hop[0] for hop in path], ["n3", "root", "root", "n7"])
+
+    def test_lookup_route(self):
+        routes = [lib.Struct("Route", network="10.0.0.0", prefix=8, gateway="a"),
+                  lib.Struct("Route", network="10.0.0.8", prefix=29, gateway="b")]
+        self.assertEqual(routing.lookup_route(routes, "10.0.0.9").gateway, "b")
+        self.assertEqual(routing.lookup_route(routes, "10.0.1.9").gateway, "a")
+        self.assertEqual(routing.lookup_route(routes, "11.0.0.1"), None)
+
+    def test_get_routing_mismatches(self):
+        routes = routing.get_routes(self.plan)
+        mismatches = list(routing.get_routing_mismatches(self.plan, routes, routes))
+        self.assertEqual(mismatches, [])
+        next_hops = list(routing.get_next_hops(self.plan, routes))
+        self.assert_(all(gateway for (name, address, gateway) in next_hops))
+        reference = dict(routes, Urcos=[])
+        mismatches = list(routing.get_routing_mismatches(self.plan, routes, reference))
+        self.assertEqual(len(mismatches), 
+            len([name for (name, address, gateway) in next_hops if name == "Urcos"]))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,10 +6,11 @@ import tempfile
 import re
 from StringIO import StringIO
 
-import ns3
+from wwplan.ns3_module import ns3
 from wwplan import radiomobile
 from wwplan import ns3_lib
 from wwplan import run_siminfo
+import wwplan.netinfo
 
 def capture_output(func, *args, **kwargs):
     fd = tempfile.TemporaryFile()
@@ -31,23 +32,34 @@ class RunSiminfoTest(unittest.TestCase):
         filename = "udp_echo.siminfo.yml"
         return os.path.join(os.path.dirname(__file__), filename)
 
+    def test_validate_siminfo(self):
+        config = wwplan.netinfo.load_yaml_file(self._get_netinfo_file())
+        run_siminfo.validate_siminfo(config)
+        config["apps"][0]["type"] = "unknown_app"
+        config["logs"]["UdpEchoClientApplication"] = "level_unknown"
+        config["apps"][0]["packet_size"] = "big"
+        del config["netinfo"]
+        errors = list(run_siminfo.get_siminfo_errors(config))
+        self.assertEqual(len(errors), 4)
+        self.assertRaises(ValueError, run_siminfo.validate_siminfo, config)
+        
     def test_siminfo(self):
         netinfo_path = self._get_netinfo_file()
         stream = StringIO()
         err, retval = capture_output(run_siminfo.siminfo, netinfo_path, stream=stream)
         expected_debug = """
-Sent 1024 bytes to 10.1.3.1
-Received 1024 bytes from 10.1.0.1
-Received 1024 bytes from 10.1.3.1
-Sent 1024 bytes to 10.1.3.1
-Received 1024 bytes from 10.1.0.1
-Received 1024 bytes from 10.1.3.1""".strip().splitlines()
+Sent 1024 bytes to 10.0.0.9
+Received 1024 bytes from 10.0.0.17
+Received 1024 bytes from 10.0.0.9
+Sent 1024 bytes to 10.0.0.9
+Received 1024 bytes from 10.0.0.17
+Received 1024 bytes from 10.0.0.9""".strip().splitlines()
         # remove first field (time)
         err2 = [" ".join(s.split()[1:]) for s in err.splitlines()]
         self.assertEqual(err2, expected_debug)
         results = stream.getvalue()
-        re_flow1 = r"^Flow 1 \(UDP\) - 10.1.0.1/\d+ \(Urcos:Huiracochan-wifi1\) --> 10.1.3.1/9 \(Ccatcca:Josjo2-wimax2\)"
-        re_flow2 = r"^Flow 2 \(UDP\) - 10.1.3.1/9 \(Ccatcca:Josjo2-wimax2\) --> 10.1.0.1/\d+ \(Urcos:Huiracochan-wifi1\)"
+        re_flow1 = r"^Flow 1 \(UDP\) - 10.0.0.17/\d+ \(Urcos:Huiracochan-wifi1\) --> 10.0.0.9/9 \(Ccatcca:Josjo2-wimax2\)"
+        re_flow2 = r"^Flow 2 \(UDP\) - 10.0.0.9/9 \(Ccatcca:Josjo2-wimax2\) --> 10.0.0.17/\d+ \(Urcos:Huiracochan-wifi1\)"
         self.assert_(re.search(re_flow1, results, re.M))
         self.assert_(re.search(re_flow2, results, re.M))       
         
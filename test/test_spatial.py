@@ -0,0 +1,44 @@
+#!/usr/bin/python
+import unittest
+import random
+import math
+
+from wwplan import spatial
+
+class SpatialIndexTest(unittest.TestCase):
+    def setUp(self):
+        rand = random.Random(1)
+        self.locations = [("unit%d" % index, (rand.randint(-50000, 50000),
+            rand.randint(-50000, 50000))) for index in range(200)]
+        self.index = spatial.SpatialIndex(self.locations)
+
+    def _distance(self, point1, point2):
+        return math.sqrt((point2[0] - point1[0])**2 + (point2[1] - point1[1])**2)
+
+    def test_distance(self):
+        index = spatial.SpatialIndex([("a", (10, 20)), ("b", (13, 24))])
+        self.assertEqual(index.distance("a", "b"), 5.0)
+        self.assertEqual(index.distance("a", (10, 21)), 1.0)
+        self.assertEqual(index.max_distance("a", ["a", "b"]), 5.0)
+
+    def test_within(self):
+        for name, point in self.locations[:20]:
+            expected = [name2 for (name2, point2) in self.locations
+                if self._distance(point, point2) <= 15000]
+            self.assertEqual(self.index.within(name, 15000), expected)
+
+    def test_nearest(self):
+        for name, point in self.locations[:20]:
+            distance, expected = min((self._distance(point, point2), name2)
+                for (name2, point2) in self.locations if name2 != name)
+            self.assertEqual(self.index.nearest(name, exclude=[name]),
+                (expected, distance))
+        self.assertEqual(self.index.nearest(self.locations[5][1])[0], "unit5")
+
+    def test_subset(self):
+        subset = self.index.subset(["unit1", "unit2"])
+        self.assertEqual(len(subset), 2)
+        self.assertEqual(subset.nearest(self.locations[1][1]), ("unit1", 0.0))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+"""
+IPv4 address planning: subnets with variable prefix lengths (sized to the
+number of hosts of each network) allocated from a base network.
+
+>>> allocator = SubnetAllocator("10.0.0.0", 8)
+>>> subnets = allocate_subnets(allocator, [("net1", ["ap1", "sta1"]), ("net2", ["ap2"])])
+>>> subnets["net1"]
+{'network': '10.0.0.0', 'prefix': 30, 'addresses': {'ap1': '10.0.0.1', 'sta1': '10.0.0.2'}}
+"""
+import math
+import socket
+import struct
+
+# Base network (address, prefix length) used for all subnets of a plan
+DEFAULT_BASE_NETWORK = ("10.0.0.0", 8)
+
+def ip_to_int(address):
+    """Return the 32-bit integer for a dotted IPv4 address."""
+    return struct.unpack("!I", socket.inet_aton(address))[0]
+
+def int_to_ip(value):
+    """Return the dotted IPv4 address for a 32-bit integer."""
+    return socket.inet_ntoa(struct.pack("!I", value))
+
+def get_netmask(prefix):
+    """Return the dotted netmask for a prefix length."""
+    return int_to_ip((0xffffffff << (32 - prefix)) & 0xffffffff)
+
+def get_prefix_length(hosts):
+    """Return the longest prefix length (at most /30) with room for hosts."""
+    bits = int(math.ceil(math.log(hosts + 2, 2)))
+    return 32 - max(bits, 2)
+
+class SubnetAllocator(object):
+    """
+    Buddy allocator of subnets within a base network. Free blocks are kept
+    as pairs (start, prefix), a block being split in halves when a longer
+    prefix is requested.
+    """
+    def __init__(self, address, prefix):
+        start = ip_to_int(address)
+        if start & ~(0xffffffff << (32 - prefix)) & 0xffffffff:
+            raise ValueError, "Base network is not aligned: %s/%d" % (address, prefix)
+        self.free_blocks = set([(start, prefix)])
+
+    def _split(self, block, start, prefix):
+        """Split a free block until (start, prefix) is a free block."""
+        self.free_blocks.remove(block)
+        block_start, block_prefix = block
+        while block_prefix < prefix:
+            block_prefix += 1
+            half = 1 << (32 - block_prefix)
+            if start >= block_start + half:
+                self.free_blocks.add((block_start, block_prefix))
+                block_start += half
+            else:
+                self.free_blocks.add((block_start + half, block_prefix))
+
+    def reserve(self, address, prefix):
+        """Mark subnet address/prefix as used."""
+        start = ip_to_int(address)
+        # The free block containing the subnet is aligned to its own prefix
+        for block_prefix in xrange(prefix, -1, -1):
+            block = (start & (0xffffffff << (32 - block_prefix)) & 0xffffffff, block_prefix)
+            if block in self.free_blocks:
+                self._split(block, start, prefix)
+                return
+        raise ValueError, "Subnet not available: %s/%d" % (address, prefix)
+
+    def allocate(self, prefix):
+        """Allocate a subnet with a prefix length and return its address."""
+        candidates = [block for block in self.free_blocks if block[1] <= prefix]
+        if not candidates:
+            raise ValueError, "No room left for a /%d subnet" % prefix
+        block = max(candidates, key=lambda (start, block_prefix): (block_prefix, -start))
+        self._split(block, block[0], prefix)
+        return int_to_ip(block[0])
+
+def create_subnet(address, prefix, hosts):
+    """Return subnet dictionary (network, prefix, addresses) for hosts (in order)."""
+    start = ip_to_int(address)
+    addresses = dict((host, int_to_ip(start + index + 1))
+        for (index, host) in enumerate(hosts))
+    return dict(network=address, prefix=prefix, addresses=addresses)
+
+def allocate_subnets(allocator, networks):
+    """
+    Allocate subnets for networks (list of pairs (name, hosts)) and return
+    a dictionary of pairs (name, subnet). Larger subnets are allocated first
+    (ties in the order of networks) to keep the address space packed.
+    """
+    prefixes = [(name, hosts, get_prefix_length(len(hosts))) for (name, hosts) in networks]
+    subnets = {}
+    for name, hosts, prefix in sorted(prefixes, key=lambda x: x[2]):
+        subnets[name] = create_subnet(allocator.allocate(prefix), prefix, hosts)
+    return subnets
+
+def get_host_base(subnet, hosts):
+    """
+    Return the dotted host part of the address of the first of hosts if 
+    their addresses in subnet are consecutive (in the order of hosts), as
+    Ipv4AddressHelper.SetBase expects it. Return None otherwise.
+    """
+    values = [ip_to_int(subnet["addresses"][host]) for host in hosts]
+    if not values or values != range(values[0], values[0] + len(values)):
+        return None
+    return int_to_ip(values[0] - ip_to_int(subnet["network"]))
+
+def get_address_value(address):
+    """Return the 32-bit value of an address (dotted string or ns3.Ipv4Address)."""
+    if isinstance(address, basestring):
+        return ip_to_int(address)
+    return address.Get()
+
+class AddressIndex(object):
+    """
+    Index of information (dictionaries) of addresses, keyed by 32-bit
+    address value. The dotted address is added to the information as key
+    "address".
+    """
+    def __init__(self, pairs):
+        self.infos = {}
+        for address, info in pairs:
+            value = get_address_value(address)
+            self.infos[value] = dict(info, address=int_to_ip(value))
+
+    def __len__(self):
+        return len(self.infos)
+
+    def __getitem__(self, address):
+        return self.infos[get_address_value(address)]
+
+    def resolve(self, addresses):
+        """Return the list of information of addresses (KeyError for unknown ones)."""
+        infos = self.infos
+        return [infos[value] for value in map(get_address_value, addresses)]
@@ -0,0 +1,45 @@
+"""
+Simulator backend interface used to build networks (see network.create_network).
+
+A backend creates the simulator objects for the plan of a network: nodes
+(with internet stack and mobility), devices and channels of WiFi/WiMax
+networks, addresses, routes and applications. Implementations:
+
+    * network.Ns3Backend: ns-3 Python bindings (default).
+    * recording.RecordingBackend: records the build as data (no simulator).
+"""
+
+class Backend(object):
+    """Base class of simulator backends."""
+    def create_node(self, name):
+        """Return a node handle (stored in Node.ns3_node) for a unit."""
+        raise NotImplementedError
+
+    def install_nodes(self, nodes):
+        """Install the internet stack and mobility (Node.location) in nodes (list of Node)."""
+        raise NotImplementedError
+
+    def wifi_network(self, network_info, net_index, short_net_name, ns3_mode, nodes,
+                     node_member, terminal_members, subnet, links=None, max_distance=None):
+        """Create devices, channel and addresses of a WiFi network (see network.wifi_network)."""
+        raise NotImplementedError
+
+    def wimax_network(self, network_info, net_index, short_net_name, nodes,
+                      node_member, terminal_members, subnet, scheduler):
+        """
+        Create devices, channel and addresses of a WiMax network (see
+        network.wimax_network). Scheduler is a name (i.e. "rtps").
+        """
+        raise NotImplementedError
+
+    def install_static_routes(self, nodes, plan, routes):
+        """Install static routes (see routing.get_routes) in nodes."""
+        raise NotImplementedError
+
+    def populate_global_routes(self):
+        """Compute routes for all the nodes using the simulator global routing."""
+        raise NotImplementedError
+
+    def install_application(self, network, app_type, options):
+        """Install an application (see ns3_lib.get_available_applications)."""
+        raise NotImplementedError
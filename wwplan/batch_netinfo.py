@@ -0,0 +1,108 @@
+#!/usr/bin/python
+"""
+Convert many Radio Mobile reports to netinfo YML files using a pool of processes.
+
+Reports can be given as files or directories (reports in directories are
+found using a glob pattern). For each report, a REPORT_NAME.netinfo.yml file
+is written to the output directory (or next to the report).
+"""
+import sys
+import os
+import glob
+import traceback
+import multiprocessing
+
+from wwplan import netinfo
+
+def get_netinfo_filename(report_filename, output_directory=None):
+    """Return netinfo filename for a report (name.report.txt -> name.netinfo.yml)."""
+    directory, basename = os.path.split(report_filename)
+    name = basename
+    for suffix in [".txt", ".report"]:
+        if name.lower().endswith(suffix):
+            name = name[:-len(suffix)]
+    return os.path.join(output_directory or directory, name + ".netinfo.yml")
+
+def get_report_filenames(paths, pattern="*report.txt"):
+    """Return report filenames for paths (files or directories)."""
+    def _generator():
+        for path in paths:
+            if os.path.isdir(path):
+                for filename in sorted(glob.glob(os.path.join(path, pattern))):
+                    yield filename
+            else:
+                yield path
+    return list(_generator())
+
+def convert_report(args):
+    """
+    Worker: write the netinfo of a report to output_filename.
+
+    Return a tuple (report_filename, output_filename, error), where error is
+    None on success or a string with the exception information.
+    """
+    report_filename, output_filename = args
+    try:
+        info = netinfo.get_netinfo_from_report_file(report_filename)
+        with open(output_filename, "w") as fd:
+            netinfo.dump_yaml(info, fd)
+    except Exception:
+        return (report_filename, output_filename, traceback.format_exc())
+    return (report_filename, output_filename, None)
+
+def convert_reports(report_filenames, output_directory=None, processes=None):
+    """
+    Convert reports to netinfo files in parallel (processes defaults to the
+    number of CPUs). Yield the results of convert_report as they finish.
+    """
+    tasks = [(filename, get_netinfo_filename(filename, output_directory))
+        for filename in report_filenames]
+    if processes == 1 or len(tasks) <= 1:
+        for task in tasks:
+            yield convert_report(task)
+        return
+    pool = multiprocessing.Pool(processes)
+    try:
+        for result in pool.imap_unordered(convert_report, tasks):
+            yield result
+        pool.close()
+    except:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+
+### Main
+
+def main(args, stream=sys.stdout, error_stream=sys.stderr):
+    import optparse
+    usage = """Usage: %prog [OPTIONS] REPORT|DIRECTORY [...]
+
+    Convert Radio Mobile reports to netinfo YML files in parallel."""
+    parser = optparse.OptionParser(usage)
+    parser.add_option('-o', '--output-directory', dest='output_directory',
+        default=None, help='Write netinfo files to directory (default: next to reports)')
+    parser.add_option('-j', '--jobs', dest='processes', type="int",
+        default=None, help='Number of processes (default: number of CPUs)')
+    parser.add_option('-p', '--pattern', dest='pattern', default="*report.txt",
+        help='Glob pattern of reports in directories (default: *report.txt)')
+    options, args0 = parser.parse_args(args)
+
+    if not args0:
+        parser.print_help()
+        return 2
+    filenames = get_report_filenames(args0, options.pattern)
+    if options.output_directory and not os.path.isdir(options.output_directory):
+        os.makedirs(options.output_directory)
+    errors = 0
+    for report_filename, output_filename, error in \
+            convert_reports(filenames, options.output_directory, options.processes):
+        if error:
+            errors += 1
+            error_stream.write("%s: error\n%s" % (report_filename, error))
+        else:
+            stream.write("%s -> %s\n" % (report_filename, output_filename))
+    return (1 if errors else 0)
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
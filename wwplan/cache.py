@@ -0,0 +1,105 @@
+"""
+On-disk cache for parsed files (Radio Mobile reports, netinfo/siminfo YAML).
+
+Parsed objects are pickled into the cache directory, keyed by the content
+hash of the source file, the kind of object and its parser version. The
+total size of the cache is bounded, least recently used entries are removed
+first.
+
+The cache is disabled unless a directory is configured, either with the
+environment variable WWPLAN_CACHE_DIR or calling configure():
+
+>>> configure("/tmp/wwplan-cache", max_size=64*1024*1024)
+>>> report = load("report", "report.txt", radiomobile.parse_report, 1)
+"""
+import os
+import glob
+import hashlib
+import logging
+import tempfile
+import cPickle as pickle
+
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+
+config = {
+    "directory": os.environ.get("WWPLAN_CACHE_DIR") or None,
+    "max_size": int(os.environ.get("WWPLAN_CACHE_SIZE") or DEFAULT_MAX_SIZE),
+}
+
+def configure(directory, max_size=None):
+    """Set cache directory (None disables the cache) and its maximum size (bytes)."""
+    config["directory"] = directory
+    if max_size is not None:
+        config["max_size"] = max_size
+
+def get_file_hash(filename, blocksize=1024*1024):
+    """Return SHA-1 hex digest for the contents of a file."""
+    sha1 = hashlib.sha1()
+    with open(filename, "rb") as fd:
+        for block in iter(lambda: fd.read(blocksize), ""):
+            sha1.update(block)
+    return sha1.hexdigest()
+
+def get_entry_path(directory, kind, version, filehash):
+    """Return path of a cache entry."""
+    return os.path.join(directory, "%s-%s-%s.pickle" % (kind, version, filehash))
+
+def evict(directory, max_size):
+    """Remove least recently used entries until the cache size is below max_size."""
+    def _get_entries():
+        for path in glob.glob(os.path.join(directory, "*.pickle")):
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            yield (st.st_mtime, st.st_size, path)
+    entries = sorted(_get_entries())
+    total_size = sum(size for (mtime, size, path) in entries)
+    for mtime, size, path in entries:
+        if total_size <= max_size:
+            break
+        logging.debug("Cache: evict %s" % path)
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total_size -= size
+
+def store(path, obj):
+    """Pickle object to path (atomically)."""
+    directory = os.path.dirname(path)
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as temp_file:
+            pickle.dump(obj, temp_file, pickle.HIGHEST_PROTOCOL)
+        os.rename(temp_path, path)
+    except:
+        os.remove(temp_path)
+        raise
+
+def load(kind, filename, parse, version):
+    """
+    Return parse(filename), using the cached object if the contents of
+    filename (and the parser version) did not change.
+    """
+    directory = config["directory"]
+    if not directory:
+        return parse(filename)
+    path = get_entry_path(directory, kind, version, get_file_hash(filename))
+    try:
+        with open(path, "rb") as fd:
+            obj = pickle.load(fd)
+    except (IOError, EOFError, ValueError, AttributeError, ImportError, 
+            KeyError, IndexError, TypeError, pickle.UnpicklingError):
+        logging.debug("Cache: miss for %s (%s): %s" % (filename, kind, path))
+    else:
+        logging.debug("Cache: hit for %s (%s): %s" % (filename, kind, path))
+        os.utime(path, None)
+        return obj
+
+    obj = parse(filename)
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    store(path, obj)
+    evict(directory, config["max_size"])
+    return obj
@@ -0,0 +1,281 @@
+"""
+Analytical capacity estimation of a plan for the applications of a siminfo
+(a fast pre-simulation check, no simulator involved).
+
+Each application flow offers a load (bits/s, packets/s) to the networks
+in its path (the shortest path in hops between the units for global
+routing, the routes of the plan for static routing). The airtime of a packet is given by a closed-form 
+model:
+
+    * WiFi: 802.11 DCF basic access (DIFS + mean backoff + DATA + SIFS + ACK),
+      with the slot enlarged by the propagation delay of the maximum distance
+      of the network, as set_wifi_timeouts does.
+    * WiMax: OFDM symbols of the modulation of the subscriber station, with
+      a fixed overhead per frame.
+
+The utilization of a network is its total airtime per second. When it
+exceeds 1, flows in the network get their load scaled down (1/utilization);
+the estimated throughput of a flow is its offered load scaled by its most
+utilized network.
+
+>>> estimate = estimate_siminfo_file("udp_echo.siminfo.yml")
+>>> estimate.networks["Josjo1"]["utilization"]
+"""
+import sys
+import re
+import math
+import os
+
+from wwplan import lib
+from wwplan import plan as wwplan_plan
+from wwplan import routing
+from wwplan import network as wwnetwork
+import wwplan.netinfo
+
+# 802.11 PHY parameters: slot, SIFS, CWmin, preamble+header (seconds),
+# symbol duration (0 for DSSS, bits are sent at the rate) and ACK rate (bps).
+WIFI_PHY = {
+    "a": dict(slot=9e-6, sifs=16e-6, cw_min=15, preamble=20e-6, symbol=4e-6, ack_rate=6e6),
+    "g": dict(slot=9e-6, sifs=10e-6, cw_min=15, preamble=20e-6, symbol=4e-6, ack_rate=6e6),
+    "b": dict(slot=20e-6, sifs=10e-6, cw_min=31, preamble=192e-6, symbol=0, ack_rate=1e6),
+}
+
+# Bytes added to a UDP payload: MAC header + FCS (28), LLC/SNAP (8), IP (20), UDP (8)
+WIFI_OVERHEAD_BYTES = 28 + 8 + 20 + 8
+WIFI_ACK_BYTES = 14
+
+# WiMax OFDM PHY (256 FFT, 10 MHz): data subcarriers, symbol duration
+# (with 1/8 cyclic prefix), frame duration and symbols used by preamble and maps.
+WIMAX_DATA_SUBCARRIERS = 192
+WIMAX_SYMBOL_DURATION = 256 / 11.2e6 * (1 + 1.0 / 8)
+WIMAX_FRAME_DURATION = 0.01
+WIMAX_OVERHEAD_SYMBOLS = 20
+# Bytes added to a UDP payload: MAC header + CRC (10), IP (20), UDP (8)
+WIMAX_OVERHEAD_BYTES = 10 + 20 + 8
+
+# Coded bits per subcarrier for each WiMax modulation
+WIMAX_MODULATIONS = {
+    "bpsk_12": 0.5, "qpsk_12": 1.0, "qpsk_34": 1.5, "qam16_12": 2.0,
+    "qam16_34": 3.0, "qam64_23": 4.0, "qam64_34": 4.5,
+}
+
+def parse_wifi_mode(wifi_mode):
+    """Return pair (standard, rate in bps) for a ns-3 WiFi mode (i.e. wifia-6mbs)."""
+    match = re.match(r"wifi([abg])-([\d.]+)mbs$", wifi_mode.lower())
+    if not match:
+        raise ValueError, "Unknown WiFi mode: %s" % wifi_mode
+    standard, rate = match.groups()
+    return standard, float(rate) * 1e6
+
+def parse_data_rate(rate):
+    """Return bits/s for a ns-3 data rate string (i.e. 1Mbps, 0.5Mb/s, 10KBps)."""
+    match = re.match(r"^\s*([\d.]+)\s*([kKmMgG]?)(i?)(bps|b/s|Bps|B/s)?\s*$", str(rate))
+    if not match:
+        raise ValueError, "Unknown data rate: %s" % rate
+    value, prefix, binary, unit = match.groups()
+    base = (1024 if binary else 1000)
+    multiplier = base ** " kmg".index(prefix.lower() or " ")
+    return float(value) * multiplier * (8 if unit and unit[0] == "B" else 1)
+
+def get_wifi_airtime(wifi_mode, packet_size, max_distance):
+    """Return the airtime (seconds) of a UDP packet (DCF basic access) in a WiFi network."""
+    standard, rate = parse_wifi_mode(wifi_mode)
+    phy = WIFI_PHY[standard]
+    propagation_delay = max_distance / 3e8
+    slot = phy["slot"] + 2 * propagation_delay
+    difs = phy["sifs"] + 2 * slot
+    backoff = slot * phy["cw_min"] / 2.0
+    def _frame_duration(nbytes, frame_rate):
+        if phy["symbol"]:
+            bits_per_symbol = frame_rate * phy["symbol"]
+            nsymbols = math.ceil((16 + 8 * nbytes + 6) / bits_per_symbol)
+            return phy["preamble"] + nsymbols * phy["symbol"]
+        return phy["preamble"] + 8 * nbytes / frame_rate
+    data = _frame_duration(packet_size + WIFI_OVERHEAD_BYTES, rate)
+    ack = _frame_duration(WIFI_ACK_BYTES, phy["ack_rate"])
+    return difs + backoff + data + phy["sifs"] + ack + 2 * propagation_delay
+
+def get_wimax_airtime(wimax_mode, packet_size):
+    """Return the airtime (seconds) of a UDP packet in a WiMax network."""
+    bits_per_subcarrier = WIMAX_MODULATIONS.get(wimax_mode.lower())
+    if bits_per_subcarrier is None:
+        raise ValueError, "Unknown WiMax modulation: %s" % wimax_mode
+    bits_per_symbol = WIMAX_DATA_SUBCARRIERS * bits_per_subcarrier
+    frame_symbols = math.floor(WIMAX_FRAME_DURATION / WIMAX_SYMBOL_DURATION)
+    usable_fraction = (frame_symbols - WIMAX_OVERHEAD_SYMBOLS) / frame_symbols
+    bits = 8 * (packet_size + WIMAX_OVERHEAD_BYTES)
+    return bits / bits_per_symbol * WIMAX_SYMBOL_DURATION / usable_fraction
+
+def get_app_flows(app):
+    """
+    Return the flows of a siminfo application as a list of tuples (source,
+    destination, bits/s, packet size). Source and destination are the 
+    endpoints of the application ("client" or "server"). The load of an
+    udp_echo app is averaged over its active window (start to stop), so
+    it is bounded by the packets sent by the client (MaxPackets).
+    """
+    app_type = app["type"]
+    if app_type == "onoff":
+        ontime, offtime = app.get("ontime", 1), app.get("offtime", 0)
+        bps = parse_data_rate(app["rate"]) * ontime / float(ontime + offtime)
+        return [("client", "server", bps, app.get("packet_size", 1024))]
+    elif app_type == "udp_echo":
+        packet_size, interval = app.get("packet_size", 1024), app.get("interval", 1.0)
+        bps = 8.0 * packet_size / interval
+        if "start" in app and "stop" in app:
+            window = float(app["stop"] - app["start"])
+            npackets = int(math.ceil(window / interval))
+            if app.get("packets", 1):
+                npackets = min(npackets, app.get("packets", 1))
+            bps = 8.0 * packet_size * npackets / window
+        return [("client", "server", bps, packet_size),
+                ("server", "client", bps, packet_size)]
+    raise ValueError, "Unknown application type: %s" % app_type
+
+def get_app_errors(app):
+    """Yield error messages for the flow settings of a siminfo application."""
+    def _is_number(value, minimum=0):
+        return isinstance(value, (int, long, float)) and value >= minimum
+    for key in ["client_node", "server_node"]:
+        if key not in app:
+            yield "App has no %s: %s" % (key, app)
+    if "packet_size" in app and not (_is_number(app["packet_size"], 1) and 
+            isinstance(app["packet_size"], (int, long))):
+        yield "App packet_size must be a positive integer: %s" % app["packet_size"]
+    app_type = app.get("type")
+    if app_type == "onoff":
+        try:
+            parse_data_rate(app.get("rate"))
+        except ValueError:
+            yield "App onoff rate must be a data rate (i.e. 1Mbps): %s" % app.get("rate")
+        ontime, offtime = app.get("ontime", 1), app.get("offtime", 0)
+        if not (_is_number(ontime) and _is_number(offtime) and ontime + offtime > 0):
+            yield "App onoff ontime/offtime must be non-negative numbers " \
+                "(not both 0): %s/%s" % (ontime, offtime)
+    elif app_type == "udp_echo":
+        if not (_is_number(app.get("interval", 1.0)) and app.get("interval", 1.0) > 0):
+            yield "App udp_echo interval must be a positive number: %s" % app.get("interval")
+        packets = app.get("packets", 1)
+        if not (_is_number(packets) and isinstance(packets, (int, long))):
+            yield "App udp_echo packets must be a non-negative integer: %s" % packets
+    if "start" in app and "stop" in app and not (_is_number(app["start"]) and 
+            _is_number(app["stop"]) and app["stop"] > app["start"]):
+        yield "App start/stop must be non-negative numbers (start < stop): %s/%s" % \
+            (app["start"], app["stop"])
+
+def get_hop_airtime(netinfo, plan, hop, packet_size):
+    """Return the airtime of a packet in a hop (network name, unit, next unit)."""
+    net_name, name, next_name = hop
+    network = netinfo["networks"][net_name]
+    mode = network["mode"]
+    if mode["standard"].startswith("wifi"):
+        max_distance = plan["networks"][net_name]["max_distance"]
+        return get_wifi_airtime(mode["wifi_mode"], packet_size, max_distance)
+    elif mode["standard"].startswith("wimax"):
+        terminal = (next_name if name == network["node"]["name"] else name)
+        modes = dict((t["name"], t.get("wimax_mode")) for t in network["terminals"])
+        return get_wimax_airtime(modes[terminal], packet_size)
+    raise ValueError, "Unknown network standard: %s" % mode["standard"]
+
+def estimate_capacity(netinfo, apps, plan=None, routing_mode="global"):
+    """
+    Estimate throughput of the flows of siminfo applications in a netinfo.
+    Return a Struct with attributes:
+
+        * flows: list of dictionaries (app, source, destination, path, offered
+          and throughput in bits/s).
+        * networks: dictionary of pairs (network name, {utilization, offered}).
+    
+    Paths follow the routing mode (see network.ROUTING_MODES): shortest paths
+    in hops for global routing (ns-3 may break ties between equal-cost paths
+    differently), the routes of the plan for static routing. Plan indexes
+    are built once, and shortest paths are only computed from the distinct 
+    sources of the flows.
+    """
+    if routing_mode not in wwnetwork.ROUTING_MODES:
+        raise ValueError, "Unknown routing mode: %s" % routing_mode
+    plan = plan or wwplan_plan.create_plan(netinfo)
+    unit_networks = routing.get_unit_networks(plan)
+    device_addresses = dict(((info["node_name"], info["device_name"]), address)
+        for address, info in wwnetwork.get_ip2info(netinfo, plan).iteritems())
+    if routing_mode == "static":
+        routes = routing.get_routes(plan)
+        address_units = routing.get_address_units(plan)
+    shortest_paths = {}
+    airtimes = {}
+
+    def _get_address(name, net_name=None, device_name=None):
+        if device_name:
+            return device_addresses[(name, device_name)]
+        addresses = plan["networks"][net_name or unit_networks[name][0]]["subnet"]["addresses"]
+        return addresses[name]
+
+    def _get_path(source_name, destination_name, address):
+        if source_name == destination_name:
+            return []
+        if routing_mode == "static":
+            return routing.get_path(plan, routes, source_name, address,
+                unit_networks, address_units)
+        if source_name not in shortest_paths:
+            shortest_paths[source_name] = \
+                routing.get_shortest_paths(plan, unit_networks, source_name)
+        return routing.get_path_to_unit(shortest_paths[source_name], destination_name)
+
+    flows = []
+    networks = dict((net_name, dict(utilization=0.0, offered=0.0))
+        for net_name in netinfo["networks"])
+    for index, app in enumerate(apps):
+        server_device = app.get("server_device")
+        if server_device and (app["server_node"], server_device) not in device_addresses:
+            raise ValueError, "Device not found in plan: %s/%s" % \
+                (app["server_node"], server_device)
+        endpoints = {"client": app["client_node"], "server": app["server_node"]}
+        addresses = {}
+        for source, destination, bps, packet_size in get_app_flows(app):
+            source_name, destination_name = endpoints[source], endpoints[destination]
+            for name in [source_name, destination_name]:
+                if name not in unit_networks:
+                    raise ValueError, "Unit not found in plan: %s" % name
+            if destination not in addresses:
+                addresses[destination] = _get_address(destination_name, 
+                    device_name=(server_device if destination == "server" else None))
+            path = _get_path(source_name, destination_name, addresses[destination])
+            if path:
+                # Replies are sent to the address the request left from
+                addresses[source] = _get_address(source_name, net_name=path[0][0])
+            packets_rate = bps / (8.0 * packet_size)
+            for hop in path:
+                network = networks[hop[0]]
+                key = (hop, packet_size)
+                if key not in airtimes:
+                    airtimes[key] = get_hop_airtime(netinfo, plan, hop, packet_size)
+                network["utilization"] += packets_rate * airtimes[key]
+                network["offered"] += bps
+            flows.append(dict(app=index, source=source_name,
+                destination=destination_name, path=[hop[0] for hop in path],
+                offered=bps))
+    for flow in flows:
+        scale = min([1.0] + [1.0 / networks[net_name]["utilization"]
+            for net_name in flow["path"] if networks[net_name]["utilization"] > 1.0])
+        flow["throughput"] = flow["offered"] * scale
+    return lib.Struct("CapacityEstimate", flows=flows, networks=networks)
+
+def estimate_siminfo_file(filename, routing_mode="global"):
+    """Estimate capacity for the applications of a siminfo file."""
+    config = wwplan.netinfo.load_yaml_file(filename)
+    errors = [error for app in config.get("apps") or [] for error in get_app_errors(app)]
+    if errors:
+        raise ValueError, "Invalid siminfo apps:\n  %s" % "\n  ".join(errors)
+    siminfo_dir = os.path.dirname(os.path.abspath(filename))
+    netinfo = wwplan.netinfo.load_yaml_file(os.path.join(siminfo_dir, config["netinfo"]))
+    return estimate_capacity(netinfo, config["apps"], routing_mode=routing_mode)
+
+def print_estimate(estimate, stream=sys.stdout):
+    """Print a capacity estimate."""
+    for flow in estimate.flows:
+        stream.write("App %d: %s --> %s (%s): offered %0.3f Mbps, estimated %0.3f Mbps\n" %
+            (flow["app"], flow["source"], flow["destination"], " / ".join(flow["path"]),
+             flow["offered"] / 1e6, flow["throughput"] / 1e6))
+    for net_name, network in sorted(estimate.networks.iteritems()):
+        stream.write("Network %s: offered %0.3f Mbps, utilization %0.1f%%\n" %
+            (net_name, network["offered"] / 1e6, 100 * network["utilization"]))
@@ -0,0 +1,223 @@
+"""
+Compact storage of flow-monitor samples: for each flow, the counters of
+its FlowStats (see COUNTERS) at the sampling times, kept in preallocated
+numpy arrays instead of the FlowStats objects (which hold histograms).
+
+Samples can be delta-encoded (differences of the counters between samples,
+stored as 32-bit integers while they fit) and capped to a maximum number of
+samples per flow (ring buffer, the oldest samples are dropped).
+
+Samples can also be taken at a coarse interval (to reduce the calls from
+the simulator) and reconstructed at a finer resolution: counters are then
+linearly interpolated between samples. Interpolated points are not
+measurements (i.e. the throughput of every interval between two samples is
+their average); FlowSeries.get_measured tells them apart.
+
+Time series (throughput, loss rate, delay) are computed from the arrays
+with vectorized operations:
+
+>>> samples = FlowSamples(max_samples=1000, delta=True)
+>>> samples.add(0.1, [(1, flow_stats)])
+>>> samples[1].get_counter("rxBytes")
+>>> times, bps = get_throughput(samples[1])
+"""
+import numpy
+
+# FlowStats counters kept in samples (delaySum in nanoseconds)
+COUNTERS = ("rxBytes", "txBytes", "rxPackets", "txPackets", "lostPackets", "delaySum")
+
+# Initial number of samples allocated for a flow with no maximum
+INITIAL_SAMPLES = 64
+
+def get_flow_stats_counters(flow_stats):
+    """Return the list of COUNTERS values of a ns3.FlowStats object."""
+    return [flow_stats.rxBytes, flow_stats.txBytes, flow_stats.rxPackets,
+            flow_stats.txPackets, flow_stats.lostPackets,
+            flow_stats.delaySum.GetNanoSeconds()]
+
+class FlowSeries(object):
+    """
+    Samples (time, counters) of a flow. With max_samples the arrays have
+    a fixed size (ring buffer), otherwise they grow by doubling with no
+    bound. If resolution (seconds) is given, samples are returned 
+    interpolated at that interval.
+    """
+    def __init__(self, max_samples=None, delta=False, resolution=None):
+        self.max_samples = max_samples
+        self.delta = delta
+        self.resolution = resolution
+        size = (max_samples or INITIAL_SAMPLES)
+        self.times = numpy.zeros(size, dtype=float)
+        self.values = numpy.zeros((size, len(COUNTERS)),
+            dtype=(numpy.int32 if delta else numpy.int64))
+        self.start = 0
+        self.count = 0
+        # Delta encoding: counters before the oldest sample and at the last one
+        self.base = numpy.zeros(len(COUNTERS), dtype=numpy.int64)
+        self.last = numpy.zeros(len(COUNTERS), dtype=numpy.int64)
+        # Cached tuple (times, values, measured) in time order
+        self._arrays = None
+
+    def __len__(self):
+        return len(self.get_times())
+
+    def _grow(self):
+        self.times = numpy.concatenate([self.times, numpy.zeros_like(self.times)])
+        self.values = numpy.concatenate([self.values, numpy.zeros_like(self.values)])
+
+    def append(self, time, counters):
+        """Add a sample (counters: sequence of COUNTERS values)."""
+        counters = numpy.asarray(counters, dtype=numpy.int64)
+        self._arrays = None
+        size = len(self.times)
+        if self.count == size and not self.max_samples:
+            self._grow()
+            size = len(self.times)
+        if self.count == size:
+            # Ring buffer full: drop the oldest sample
+            if self.delta:
+                self.base += self.values[self.start]
+            self.start = (self.start + 1) % size
+            self.count -= 1
+        if self.delta:
+            value = counters - self.last
+            self.last = counters
+            limits = numpy.iinfo(self.values.dtype)
+            if self.values.dtype != numpy.int64 and \
+                    (value.min() < limits.min or value.max() > limits.max):
+                self.values = self.values.astype(numpy.int64)
+        else:
+            value = counters
+        index = (self.start + self.count) % size
+        self.times[index] = time
+        self.values[index] = value
+        self.count += 1
+
+    def _get_indexes(self):
+        return (self.start + numpy.arange(self.count)) % len(self.times)
+
+    def _get_arrays(self):
+        if self._arrays is None:
+            indexes = self._get_indexes()
+            values = self.values[indexes].astype(numpy.int64)
+            if self.delta:
+                values = numpy.cumsum(values, axis=0) + self.base
+            times = self.times[indexes]
+            measured = numpy.ones(len(times), dtype=bool)
+            if self.resolution and len(times) > 1:
+                sample_times = times
+                times, values = interpolate_samples(times, values, self.resolution)
+                measured = get_measured_mask(times, sample_times, self.resolution)
+            self._arrays = (times, values, measured)
+        return self._arrays
+
+    def get_times(self):
+        """Return array of sampling times (seconds)."""
+        return self._get_arrays()[0]
+
+    def get_values(self):
+        """Return array (samples x COUNTERS) of counter values."""
+        return self._get_arrays()[1]
+
+    def get_measured(self):
+        """
+        Return boolean array, True for the times of get_times that are 
+        samples (False for the ones interpolated at the resolution).
+        """
+        return self._get_arrays()[2]
+
+    def get_counter(self, name):
+        """Return array with the values of a counter (see COUNTERS)."""
+        return self.get_values()[:, COUNTERS.index(name)]
+
+    def get_nbytes(self):
+        """Return memory (bytes) used by the sample arrays."""
+        return self.times.nbytes + self.values.nbytes
+
+class FlowSamples(dict):
+    """Dictionary of pairs (flow_id, FlowSeries)."""
+    def __init__(self, max_samples=None, delta=False, resolution=None):
+        dict.__init__(self)
+        self.max_samples = max_samples
+        self.delta = delta
+        self.resolution = resolution
+
+    def add(self, time, flow_stats_pairs):
+        """Add a sample for pairs (flow_id, ns3.FlowStats) at time (seconds)."""
+        for flow_id, flow_stats in flow_stats_pairs:
+            series = self.get(flow_id)
+            if series is None:
+                series = self[flow_id] = FlowSeries(self.max_samples, 
+                    self.delta, self.resolution)
+            series.append(time, get_flow_stats_counters(flow_stats))
+
+def interpolate_samples(times, values, resolution):
+    """
+    Return pair (times, values) with the samples (values: samples x counters)
+    linearly interpolated every resolution seconds from the first sample.
+    """
+    nsteps = int(round((times[-1] - times[0]) / resolution))
+    fine_times = times[0] + resolution * numpy.arange(nsteps + 1)
+    fine_values = numpy.empty((len(fine_times), values.shape[1]), dtype=numpy.int64)
+    for column in range(values.shape[1]):
+        fine_values[:, column] = numpy.round(numpy.interp(fine_times, times, values[:, column]))
+    return fine_times, fine_values
+
+def get_measured_mask(times, sample_times, resolution):
+    """
+    Return boolean array, True for the times (interpolated every resolution
+    seconds, see interpolate_samples) that match a sample time.
+    """
+    indexes = numpy.round((sample_times - times[0]) / resolution).astype(int)
+    valid = (indexes >= 0) & (indexes < len(times))
+    indexes, sample_times = indexes[valid], sample_times[valid]
+    measured = numpy.zeros(len(times), dtype=bool)
+    measured[indexes] = (numpy.abs(times[indexes] - sample_times) <= resolution * 1e-6)
+    return measured
+
+### Time series
+
+def get_rates(times, values):
+    """
+    Return pair of arrays (end times, increments per second) for the
+    consecutive samples of a cumulative counter.
+    """
+    return times[1:], numpy.diff(values) / numpy.diff(times)
+
+def get_ratios(numerators, denominators):
+    """Return array of ratios of the increments of two counters (0 for no increment)."""
+    numerator, denominator = numpy.diff(numerators), numpy.diff(denominators)
+    ratios = numpy.zeros(len(denominator), dtype=float)
+    nonzero = (denominator != 0)
+    ratios[nonzero] = numerator[nonzero] / denominator[nonzero].astype(float)
+    return ratios
+
+def get_throughput(series, counter="rxBytes", measured=False):
+    """
+    Return pair of arrays (end times, throughput in bits/s) of a FlowSeries.
+    If measured is True, only the sampled points are used (see 
+    FlowSeries.get_measured), not the interpolated ones.
+    """
+    times, values = series.get_times(), series.get_counter(counter)
+    if measured:
+        mask = series.get_measured()
+        times, values = times[mask], values[mask]
+    times, rates = get_rates(times, values)
+    return times, 8 * rates
+
+def get_loss_rate(series):
+    """Return pair of arrays (end times, lost packets / tx packets) of a FlowSeries."""
+    return series.get_times()[1:], get_ratios(series.get_counter("lostPackets"),
+        series.get_counter("txPackets"))
+
+def get_mean_delay(series):
+    """Return pair of arrays (end times, mean delay in seconds) of a FlowSeries."""
+    delays = get_ratios(series.get_counter("delaySum"), series.get_counter("rxPackets"))
+    return series.get_times()[1:], delays / 1e9
+
+def get_moving_average(values, window):
+    """Return array with the averages of values in windows of 'window' samples."""
+    if len(values) < window:
+        return numpy.zeros(0, dtype=float)
+    cumulative = numpy.cumsum(numpy.concatenate([[0], values]).astype(float))
+    return (cumulative[window:] - cumulative[:-window]) / window
@@ -1,5 +1,7 @@
 """Generic functions."""
 import itertools
+import operator
+import collections
 import re
 
 class Struct:
@@ -13,6 +15,44 @@ class Struct:
             vars(self).iteritems() if not k.startswith("_")]
         return "<%s> %s" % (self._name, args)
 
+class Record(object):
+    """
+    Compact record-like class. Subclasses define the attributes in __slots__
+    (unset attributes default to None) and, optionally, _aliases: a 
+    dictionary of pairs (alias, attribute) for names that are not valid
+    Python identifiers.
+    """
+    __slots__ = ()
+    _aliases = {}
+
+    def __init__(self, **entries):
+        for attr in self.__slots__:
+            setattr(self, attr, None)
+        aliases = self._aliases
+        for key, value in entries.iteritems():
+            setattr(self, aliases.get(key, key), value)
+
+    def __getattr__(self, name):
+        if name not in self._aliases:
+            raise AttributeError, "'%s' object has no attribute '%s'" % \
+                (self.__class__.__name__, name)
+        return getattr(self, self._aliases[name])
+
+    def __getstate__(self):
+        return self._asdict()
+
+    def __setstate__(self, state):
+        for key, value in state.iteritems():
+            setattr(self, key, value)
+
+    def _asdict(self):
+        """Return a dictionary with the pairs (attribute, value) of the record."""
+        return dict((attr, getattr(self, attr)) for attr in self.__slots__)
+
+    def __repr__(self):
+        args = [(attr, getattr(self, attr)) for attr in self.__slots__]
+        return "<%s> %s" % (self.__class__.__name__, args)
+
 def first(it):
     """Return first item in iterable."""
     return it.next()
@@ -34,14 +74,29 @@ def flatten(lst):
     return [y for x in lst for y in x]
 
 def split_iter_of_consecutive(it, pred, n):
-    """Yield groups in iterable delimited by n consecutive items that match predicate."""
-    lst = list(it)
-    indexes = [idx for (idx, x) in enumerate(lst) if pred(x)]
-    indexeslst = [[x[1] for x in group] for (match, group) 
-        in itertools.groupby(enumerate(indexes), lambda (i, x): i - x)]
-    split_indexes = [(idxs[0], idxs[-1]+1) for idxs in indexeslst if len(idxs) >= n]
-    for start, end in grouper(2, [0] + flatten(split_indexes) + [None]):
-        yield lst[start:end]   
+    """
+    Yield groups in iterable delimited by n consecutive items that match predicate.
+    
+    Items are consumed lazily, only the current group is kept in memory.
+    """
+    group, separators = [], []
+    for x in it:
+        if pred(x):
+            separators.append(x)
+            continue
+        if len(separators) >= n:
+            yield group
+            group = []
+        else:
+            group.extend(separators)
+        separators = []
+        group.append(x)
+    if len(separators) >= n:
+        yield group
+        group = []
+    else:
+        group.extend(separators)
+    yield group
 
 def split_iter(it, condition, skip_sep=False):
     """Split iterable yield elements grouped by condition."""
@@ -77,17 +132,41 @@ def keyify(s):
     """Replaces spaces in string for underscores and remove chars '.:'"""
     return re.sub("\s+", "_", s).replace(".", "").replace(":", "").lower() 
 
-def parse_table(lines, fields, keyify_cb=None):
-    """Parse table and yield dictionaries containing the row info."""
-    def _find_columns(line, fields):
-        return [(field, line.index(field)) for field in fields]
-    header, units = lines[0], lines[1:]
-    columns = _find_columns(header, fields)
-    fields, indexes = zip(*columns)
-    for line in strip_iter_items(units):
-        def _pairs():
-            for field, (start, end) in zip(fields, pairwise(indexes+(None,))):
-                key = (keyify(field) if (not keyify_cb or keyify_cb(field)) else field)
-                value = line[start:end].strip()
-                yield (key, value)
-        yield dict(_pairs())
+def compile_table_header(header, fields, keyify_cb=None):
+    """
+    Compile the header of a table into a row decoder. Return a pair 
+    (keys, decode_row), where decode_row(line) returns the tuple of 
+    (stripped) values for the fields in the row.
+    """
+    indexes = [header.index(field) for field in fields]
+    slices = [slice(start, end) for (start, end) in pairwise(indexes + [None])]
+    keys = tuple((keyify(field) if (not keyify_cb or keyify_cb(field)) else field)
+        for field in fields)
+    get_columns = operator.itemgetter(*slices)
+    if len(slices) == 1:
+        def decode_row(line):
+            return (get_columns(line).strip(),)
+    else:
+        def decode_row(line):
+            return tuple([value.strip() for value in get_columns(line)])
+    return keys, decode_row
+
+def parse_table(lines, fields, keyify_cb=None, row_type="dict"):
+    """
+    Parse table and yield the row info. Rows are yielded as dictionaries,
+    or as plain tuples/namedtuples (in fields order) if row_type is 
+    "tuple"/"namedtuple".
+    """
+    lines = iter(lines)
+    header = first(lines)
+    keys, decode_row = compile_table_header(header, fields, keyify_cb)
+    rows = itertools.imap(decode_row, itertools.ifilter(bool, lines))
+    if row_type == "dict":
+        return (dict(itertools.izip(keys, row)) for row in rows)
+    elif row_type == "tuple":
+        return rows
+    elif row_type == "namedtuple":
+        row_class = collections.namedtuple("Row", keys, rename=True)
+        return itertools.imap(row_class._make, rows)
+    else:
+        raise ValueError, "Unknown row type: %s" % row_type
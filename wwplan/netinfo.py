@@ -2,11 +2,23 @@
 """Create a Netinfo (simplified network info) from a Radio Mobile network struct."""
 import sys
 import re
+import logging
 
 import yaml
+try:
+    from yaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper
+except ImportError:
+    from yaml import SafeLoader, SafeDumper
 
 from wwplan import lib
 from wwplan import radiomobile
+from wwplan import cache
+
+# Increase when the netinfo structure changes (invalidates cached netinfos)
+NETINFO_VERSION = 3
+
+# Radio settings of a network member (see radiomobile.get_system_budget)
+RADIO_KEYS = ("tx_power", "loss", "rx_threshold", "antenna_gain")
 
 def bracket_split(s):
     """Split a 's1 [s2]' string into a ('s1', 's2') tuple."""
@@ -33,7 +45,7 @@ def get_netinfo_from_report(report):
             "elevation": ("elevation", None),
             "location_meters": ("location", lambda loc: list(loc)),
         }
-        units[unit_name] = dict(transform(vars(unit), transform_properties))
+        units[unit_name] = dict(transform(unit._asdict(), transform_properties))
     output["units"] = units
     
     networks = {}
@@ -49,20 +61,132 @@ def get_netinfo_from_report(report):
         nodes, terminals = lib.partition(net.net_members.items(),
             lambda (name, member): member.role.lower() in ("node", "master"))
         assert len(nodes) == 1
+        budgets = radiomobile.get_member_budgets(net, report.systems)
         def _get_info(name, obj):
             short_system_name, wimax_mode = bracket_split(obj.system)
-            d = dict(name=name, system=short_system_name, wimax_mode=wimax_mode)
+            radio = dict((k, round(v, 2)) for (k, v) in budgets[name].iteritems())
+            d = dict(name=name, system=short_system_name, wimax_mode=wimax_mode,
+                radio=radio)
             return dict((k, v) for (k, v) in d.items() if v)                     
         network_info = {
             "mode": mode,
             "node": _get_info(*nodes[0]),
             "terminals": [_get_info(*terminal) for terminal in terminals],
         }
+        losses = radiomobile.get_net_link_losses(net, report.systems)
+        if losses is None:
+            logging.warning("Net '%s': quality is not a signal level (%s), no link losses" %
+                (net_name, net.quality_legend))
+        else:
+            network_info["links"] = [dict(peers=list(peers), loss=round(loss, 2)) 
+                for (peers, loss) in losses]
         networks[short_net_name] = network_info 
     output["networks"] = networks
     
     return output
 
+def get_netinfo_errors(netinfo):
+    """Yield error messages for a netinfo structure (empty if it's valid)."""
+    def _is_dict(obj):
+        return isinstance(obj, dict)
+    def _check_member(net_name, member, units, wimax_mode):
+        if not _is_dict(member) or "name" not in member or "system" not in member:
+            yield "Network '%s': members must have name and system: %s" % (net_name, member)
+            return
+        if member["name"] not in units:
+            yield "Network '%s': unknown unit '%s'" % (net_name, member["name"])
+        if wimax_mode and "wimax_mode" not in member:
+            yield "Network '%s': member '%s' has no wimax_mode" % (net_name, member["name"])
+        radio = member.get("radio")
+        if radio is not None and not (_is_dict(radio) and all(isinstance(radio.get(key), 
+                (int, long, float)) for key in RADIO_KEYS)):
+            yield "Network '%s': member '%s' radio must have numbers %s: %s" % \
+                (net_name, member["name"], ", ".join(RADIO_KEYS), radio)
+    
+    if not _is_dict(netinfo):
+        yield "Netinfo must be a dictionary"
+        return
+    for key in ["units", "networks"]:
+        if not _is_dict(netinfo.get(key)):
+            yield "Netinfo must have a dictionary '%s'" % key
+    units = (netinfo.get("units") if _is_dict(netinfo.get("units")) else {})
+    networks = (netinfo.get("networks") if _is_dict(netinfo.get("networks")) else {})
+
+    for unit_name, unit in units.iteritems():
+        location = (unit.get("location") if _is_dict(unit) else None)
+        if not (isinstance(location, (list, tuple)) and len(location) == 2 and 
+                all(isinstance(x, (int, long, float)) for x in location)):
+            yield "Unit '%s': location must be a pair of numbers (x, y)" % unit_name
+                     
+    for net_name, network in networks.iteritems():
+        if not _is_dict(network):
+            yield "Network '%s' must be a dictionary" % net_name
+            continue
+        mode = network.get("mode")
+        standard = (mode.get("standard") if _is_dict(mode) else None)
+        if standard == "wifi":
+            if "wifi_mode" not in mode:
+                yield "Network '%s': wifi mode has no wifi_mode" % net_name
+        elif standard == "wimax":
+            if "wimax_scheduler" not in mode:
+                yield "Network '%s': wimax mode has no wimax_scheduler" % net_name
+        else:
+            yield "Network '%s': mode standard must be wifi or wimax: %s" % (net_name, mode)
+        for error in _check_member(net_name, network.get("node"), units, False):
+            yield error
+        links = network.get("links") or []
+        members = [network.get("node")] + (network.get("terminals") or [])
+        if links and standard == "wifi" and not all(_is_dict(member) and 
+                "radio" in member for member in members):
+            yield "Network '%s': links (path losses) need radio settings in all members" % \
+                net_name
+        for link in links:
+            if not (_is_dict(link) and isinstance(link.get("peers"), list) and 
+                    isinstance(link.get("loss"), (int, long, float))):
+                yield "Network '%s': links must have peers and loss: %s" % (net_name, link)
+            elif not all(peer in units for peer in link["peers"]):
+                yield "Network '%s': unknown peers in link: %s" % (net_name, link["peers"])
+        terminals = network.get("terminals")
+        if not isinstance(terminals, list) or not terminals:
+            yield "Network '%s': terminals must be a non-empty list" % net_name
+            continue
+        for terminal in terminals:
+            for error in _check_member(net_name, terminal, units, standard == "wimax"):
+                yield error
+
+def validate_netinfo(netinfo):
+    """Check a netinfo structure, raise a ValueError with all errors found."""
+    errors = list(get_netinfo_errors(netinfo))
+    if errors:
+        raise ValueError, "Invalid netinfo:\n  %s" % "\n  ".join(errors)
+
+def load_yaml(stream):
+    """Load YAML from a string or stream (using libyaml, if available)."""
+    return yaml.load(stream, Loader=SafeLoader)
+
+def dump_yaml(data, stream=None):
+    """Dump data to YAML (using libyaml, if available). Return string if no stream given."""
+    return yaml.dump(data, stream, Dumper=SafeDumper)
+
+def parse_report_file(filename):
+    """Return a Radio Mobile report struct for a report filename (cached)."""
+    return cache.load("report", filename, radiomobile.parse_report,
+        radiomobile.PARSER_VERSION)
+
+def get_netinfo_from_report_file(filename):
+    """Return a netinfo (dictionary) from a Radio Mobile report filename (cached)."""
+    def _parse(filename):
+        return get_netinfo_from_report(parse_report_file(filename))
+    version = "%s.%s" % (radiomobile.PARSER_VERSION, NETINFO_VERSION)
+    return cache.load("netinfo", filename, _parse, version)
+
+def load_yaml_file(filename):
+    """Return the contents of a YAML file (cached)."""
+    def _load(filename):
+        with open(filename) as fd:
+            return load_yaml(fd)
+    return cache.load("yaml", filename, _load, 1)
+
 ### Main
 
 def main(args, stream=sys.stdout):
@@ -77,9 +201,8 @@ def main(args, stream=sys.stdout):
         parser.print_help()
         return 2
     report_filename, = args0
-    report = radiomobile.parse_report(report_filename)
-    netinfo = get_netinfo_from_report(report)
-    stream.write(yaml.dump(netinfo))    
+    netinfo = get_netinfo_from_report_file(report_filename)
+    dump_yaml(netinfo, stream)
 
 if __name__ == '__main__':
     sys.exit(main(sys.argv[1:]))
@@ -4,7 +4,7 @@ Interface module between Radio Mobile and ns-3.
 The struct 'Network' has the following attributes:
     
     * nodes: dictionary of nodes with pairs (name, node_attributes). Node attributes:
-        * ns3_node: ns3.Node object for the node.
+        * ns3_node: ns3.Node object for the node (node handle of the backend).
         * location: (x, y) in meters.
         * devices: dictionary of devices with pairs (name, device_attributes). Device attributes:
             * ns3_device: ns3.NetDevice object for this device.
@@ -15,6 +15,18 @@ The struct 'Network' has the following attributes:
     * networks: dictionary of networks with pairs (name, network_struct). Network struct attributes:
         * node: Node name.
         * terminal: List of terminals name. 
+            
+    * plan: serializable plan of the network (see wwplan.plan).
+    
+    * ip2info: dictionary of pairs (address, {"device_name", "node_name"}).
+    
+    * address_index: addressing.AddressIndex of all the interfaces of the nodes.
+    
+    * spatial_index: spatial.SpatialIndex with the location of all nodes.
+    
+    * ap_index: spatial.SpatialIndex with the location of AP/BS nodes.
+    
+    * backend: simulator backend used to build the network (see wwplan.backend).
 
 Examples:
             
@@ -29,13 +41,34 @@ import logging
 import math
 from pprint import pprint, pformat
 
-import yaml
-import ns3
+from wwplan.ns3_module import ns3
 
 from wwplan import lib
-from wwplan import radiomobile
+from wwplan import spatial
+from wwplan import addressing
+from wwplan import backend
 import wwplan.netinfo
+import wwplan.plan
+import wwplan.routing
                                          
+class Node(lib.Record):
+    """Node of a network (see module docstring)."""
+    __slots__ = ("name", "location", "ns3_node", "devices")
+
+class Device(lib.Record):
+    """Device of a node (see module docstring)."""
+    __slots__ = ("ns3_device", "helper", "phy_helper", "interfaces", "wimax_flow_services")
+
+class Interface(lib.Record):
+    """Interface (address) of a device."""
+    __slots__ = ("address",)
+
+# Path loss (dB) between nodes of a network with no link in the netinfo
+DEFAULT_LINK_LOSS = 200.0
+
+# Routing modes: global (ns-3 global routing) or static (routes from the plan)
+ROUTING_MODES = ["global", "static"]
+
 def set_logging_level(level, format='%(levelname)s -- %(message)s'):
     """Set logging level (DEBUG, WARNING, INFO, ERROR) and message format."""
     logging.basicConfig(level=level, format=format)
@@ -50,14 +83,43 @@ def get_max_distance_in_network(nodes, node_member, terminal_members):
     return max(get_distance(nodes[terminal_member].location, node_location) 
                for terminal_member in terminal_members)
 
+def get_nearest_ap(network, location):
+    """Return pair (name, distance) for the AP/BS node nearest to a location (name or point)."""
+    point = network.spatial_index.get_point(location)
+    exclude = ([location] if isinstance(location, basestring) else [])
+    return network.ap_index.nearest(point, exclude)
+
 def get_device_key(net, system):
     return net + "-" + system
+
+def get_address_index(nodes):
+    """Return an addressing.AddressIndex for all the interfaces of nodes."""
+    def _pairs():
+        for node_name, node in nodes.iteritems():
+            for device_name, device in node.devices.iteritems():
+                for interface in device.interfaces:
+                    yield interface.address, dict(device_name=device_name, node_name=node_name)
+    return addressing.AddressIndex(_pairs())
+
+def get_ip2info(netinfo, plan):
+    """
+    Return a dictionary of pairs (address, {"device_name", "node_name"}) 
+    with all the addresses in the plan of a netinfo.
+    """
+    ip2info = {}
+    for net_name, network_plan in plan["networks"].iteritems():
+        network = netinfo["networks"][net_name]
+        systems = dict((d["name"], d["system"]) for d in [network["node"]] + network["terminals"])
+        for name, address in network_plan["subnet"]["addresses"].iteritems():
+            device_name = get_device_key(net_name, systems[name])
+            ip2info[address] = dict(device_name=device_name, node_name=name)
+    return ip2info
     
 def add_device_to_node(node, short_net_name, network, ns3_device, helper=None, phy_helper=None):
     """Add a ns-3 device to a node structure."""
     attributes = network[node.name]
     device_key = get_device_key(short_net_name, attributes["system"])
-    device = lib.Struct("Device", ns3_device=ns3_device, helper=helper,
+    device = Device(ns3_device=ns3_device, helper=helper,
         phy_helper=phy_helper, interfaces=[], wimax_flow_services=[])
     node.devices[device_key] = device
     
@@ -65,7 +127,7 @@ def add_interface_to_device_node(node, short_net_name, network, address):
     """Add a ns-3 interface (address) to node.devices[system_name].interfaces."""
     attributes = network[node.name]
     device_key = get_device_key(short_net_name, attributes["system"])
-    interface = lib.Struct("Interface", address=address)
+    interface = Interface(address=address)
     logging.info("Add interface to node %s (%s)" % (node.name, str(address)))
     node.devices[device_key].interfaces.append(interface)
 
@@ -86,78 +148,220 @@ def set_wifi_timeouts(device, max_distance):
         mac.GetMaxPropagationDelay().GetNanoSeconds() * 2)
     mac.SetSlot(slot_time)
 
+def assign_addresses(devices, names, subnet):
+    """
+    Assign the planned addresses of a subnet (see wwplan.addressing) to the 
+    devices of a ns3.NetDeviceContainer (in the same order as names). Return 
+    the list of ns3.Ipv4Address objects.
+    
+    Consecutive addresses (the usual case, hosts are numbered in order) are 
+    assigned with a single Ipv4AddressHelper.Assign call, otherwise they are
+    added one interface at a time.
+    """
+    netmask = ns3.Ipv4Mask(addressing.get_netmask(subnet["prefix"]))
+    host_base = addressing.get_host_base(subnet, names)
+    if host_base:
+        address_helper = ns3.Ipv4AddressHelper()
+        address_helper.SetBase(ns3.Ipv4Address(subnet["network"]), netmask, 
+            ns3.Ipv4Address(host_base))
+        address_helper.Assign(devices)
+        return [ns3.Ipv4Address(subnet["addresses"][name]) for name in names]
+    addresses = []
+    for index, name in enumerate(names):
+        device = devices.Get(index)
+        ipv4 = device.GetNode().GetObject(ns3.Ipv4.GetTypeId())
+        interface = ipv4.GetInterfaceForDevice(device)
+        if interface == -1:
+            interface = ipv4.AddInterface(device)
+        address = ns3.Ipv4Address(subnet["addresses"][name])
+        ipv4.AddAddress(interface, ns3.Ipv4InterfaceAddress(address, netmask))
+        ipv4.SetMetric(interface, 1)
+        ipv4.SetUp(interface)
+        addresses.append(address)
+    return addresses
+
+def get_mobility_model(ns3_node):
+    """Return the ns3.MobilityModel object aggregated to a ns-3 node."""
+    return ns3_node.GetObject(ns3.MobilityModel.GetTypeId())
+
+def create_link_loss_channel(links, nodes, default_loss=DEFAULT_LINK_LOSS):
+    """
+    Return a ns3.YansWifiChannel using a matrix propagation loss model with the
+    precomputed path losses of links (list of dictionaries with keys peers/loss).
+    Pairs of nodes with no link use default_loss (dB).
+    """
+    loss_model = ns3.MatrixPropagationLossModel()
+    loss_model.SetDefaultLoss(default_loss)
+    for link in links:
+        mobility1, mobility2 = [get_mobility_model(nodes[peer].ns3_node) 
+            for peer in link["peers"]]
+        loss_model.SetLoss(mobility1, mobility2, link["loss"], True)
+    channel = ns3.YansWifiChannel()
+    channel.SetPropagationDelayModel(ns3.ConstantSpeedPropagationDelayModel())
+    channel.SetPropagationLossModel(loss_model)
+    return channel
+
+def get_wifi_phy_attributes(radio):
+    """
+    Return a dictionary of pairs (YansWifiPhy attribute, value) for the radio 
+    settings of a member (see wwplan.netinfo.RADIO_KEYS). Line losses are 
+    applied to the transmitted power and to the reception gain, and the
+    detection thresholds are the receiver threshold, so the received power 
+    through the link path loss (see radiomobile.get_link_path_loss) is the 
+    one predicted by the report.
+    """
+    tx_power = radio["tx_power"] - radio["loss"]
+    return {
+        "TxPowerStart": tx_power,
+        "TxPowerEnd": tx_power,
+        "TxGain": radio["antenna_gain"],
+        "RxGain": radio["antenna_gain"] - radio["loss"],
+        "EnergyDetectionThreshold": radio["rx_threshold"],
+        "CcaMode1Threshold": radio["rx_threshold"],
+    }
+
+def get_received_power(path_loss, tx_radio, rx_radio):
+    """Return the power (dBm) received through a link as YansWifiPhy computes it."""
+    tx_attributes = get_wifi_phy_attributes(tx_radio)
+    rx_attributes = get_wifi_phy_attributes(rx_radio)
+    return tx_attributes["TxPowerStart"] + tx_attributes["TxGain"] - \
+        path_loss + rx_attributes["RxGain"]
+
+def get_radio_key(radio):
+    """Return a hashable key for member radio settings (None for no settings)."""
+    return (tuple(sorted(radio.iteritems())) if radio else None)
+
+def get_wifi_phy_helper(helpers, radio_key):
+    """
+    Return the YansWifiPhyHelper for a radio key (see get_radio_key), reusing
+    the ones in the cache dictionary 'helpers'. With no radio settings the 
+    helper keeps the ns-3 defaults.
+    """
+    phy_key = ("phy", radio_key)
+    if phy_key not in helpers:
+        phy = ns3.YansWifiPhyHelper.Default()
+        if radio_key:
+            for name, value in sorted(get_wifi_phy_attributes(dict(radio_key)).iteritems()):
+                phy.Set(name, ns3.DoubleValue(value))
+        helpers[phy_key] = phy
+    return helpers[phy_key]
+
+def get_wifi_helpers(helpers, ns3_mode):
+    """
+    Return a Struct with the WiFi helpers for a ns-3 mode, reusing the ones
+    in the cache dictionary 'helpers' (shared by all networks).
+    
+    Helpers are only configuration: each network still gets its own channel
+    (created from the shared channel helper) and its own SSID. STA and AP
+    have separate MAC helpers (sta_mac, ap_mac), so the attributes set for
+    one role never leak into the other.
+    """
+    if "channel" not in helpers:
+        channel = ns3.YansWifiChannelHelper.Default()
+        channel.SetPropagationDelay("ns3::ConstantSpeedPropagationDelayModel")
+        channel.AddPropagationLoss("ns3::FixedRssLossModel", "Rss", ns3.DoubleValue(0))
+        helpers["channel"] = channel
+        helpers["sta_mac"] = ns3.NqosWifiMacHelper.Default()
+        helpers["ap_mac"] = ns3.NqosWifiMacHelper.Default()
+        # AP uses the default remote station manager
+        helpers["ap"] = ns3.WifiHelper.Default()
+    sta_key = ("sta", ns3_mode)
+    if sta_key not in helpers:
+        wifi_helper = ns3.WifiHelper.Default()
+        wifi_helper.SetRemoteStationManager("ns3::ConstantRateWifiManager",
+            "DataMode", ns3.StringValue(ns3_mode),
+            "RtsCtsThreshold", ns3.StringValue("2200"))
+        helpers[sta_key] = wifi_helper
+    return lib.Struct("WifiHelpers", channel=helpers["channel"],
+        sta_mac=helpers["sta_mac"], ap_mac=helpers["ap_mac"], 
+        sta=helpers[sta_key], ap=helpers["ap"])
+
 def wifi_network(network_info, net_index, short_net_name, ns3_mode, nodes, 
-                 get_node_from_ns3node, node_member, terminal_members):
-    """Configure a WiFi network (1 AP - n STAs)."""                    
-    max_distance = get_max_distance_in_network(nodes, node_member, terminal_members)
+                 get_node_from_ns3node, node_member, terminal_members, subnet,
+                 helpers=None, links=None, max_distance=None):
+    """
+    Configure a WiFi network (1 AP - n STAs) with the addresses of a planned 
+    subnet. If links (with path losses) are given, the channel uses a matrix
+    propagation loss model, otherwise all nodes receive with a fixed RSS 
+    (perfect links). The PHY of members with radio settings (network_info
+    key "radio") is configured with them (see get_wifi_phy_attributes); 
+    links require radio settings in all members, as path losses are relative
+    to them.
+    """
+    helpers = (helpers if helpers is not None else {})
+    if links and not all(network_info[name].get("radio") for name in network_info):
+        raise ValueError, "Network '%s': links (path losses) need radio settings " \
+            "in all members" % short_net_name
+    if max_distance is None:
+        max_distance = get_max_distance_in_network(nodes, node_member, terminal_members)
                         
     logging.info("Network '%s': AP-node = '%s', STA-nodes = %s" % 
         (short_net_name, node_member, terminal_members))
     logging.info("Network '%s': ns-3 mode: %s, max_distance: %d meters" %
         (short_net_name, ns3_mode, max_distance))
-        
-    # Wifi channel
-    channel = ns3.YansWifiChannelHelper.Default()
-    phy = ns3.YansWifiPhyHelper.Default()        
-    channel = ns3.YansWifiChannelHelper.Default()
-    channel.SetPropagationDelay("ns3::ConstantSpeedPropagationDelayModel")
-    channel.AddPropagationLoss("ns3::FixedRssLossModel", "Rss", ns3.DoubleValue(0))
-    phy.SetChannel(channel.Create())
-
-    address_helper = ns3.Ipv4AddressHelper()
-    netaddr = "10.1.%d.0" % net_index
-    address_helper.SetBase(ns3.Ipv4Address(netaddr), ns3.Ipv4Mask("255.255.255.0"))    
     
-    def configure_node(wifi_helper, name):
-        ns3_node = nodes[name].ns3_node
-        sta_device = wifi_helper.Install(phy, mac, ns3_node)
-        node = get_node_from_ns3node(ns3_node)
-        add_device_to_node(node, short_net_name, network_info, sta_device.Get(0), 
-            helper=wifi_helper, phy_helper=phy)
-        set_wifi_timeouts(sta_device.Get(0), max_distance)
-        sta_interface = address_helper.Assign(sta_device)
-        address = sta_interface.GetAddress(0)
-        add_interface_to_device_node(node, short_net_name, network_info, address)
+    wifi = get_wifi_helpers(helpers, ns3_mode)    
+    if links:
+        channel = create_link_loss_channel(links, nodes)
+    else:
+        channel = wifi.channel.Create()
+    
+    def configure_nodes(wifi_helper, mac, names):
+        # One install for each group of members with the same radio settings
+        groups = {}
+        for name in names:
+            radio_key = get_radio_key(network_info[name].get("radio"))
+            groups.setdefault(radio_key, []).append(name)
+        devices = ns3.NetDeviceContainer()
+        installed_names, phy_helpers = [], []
+        for radio_key, group_names in sorted(groups.iteritems()):
+            phy = get_wifi_phy_helper(helpers, radio_key)
+            phy.SetChannel(channel)
+            container = ns3.NodeContainer()
+            for name in group_names:
+                container.Add(nodes[name].ns3_node)
+            devices.Add(wifi_helper.Install(phy, mac, container))
+            installed_names.extend(group_names)
+            phy_helpers.extend([phy] * len(group_names))
+        addresses = assign_addresses(devices, installed_names, subnet)
+        for index, name in enumerate(installed_names):
+            node = nodes[name]
+            device = devices.Get(index)
+            add_device_to_node(node, short_net_name, network_info, device, 
+                helper=wifi_helper, phy_helper=phy_helpers[index])
+            set_wifi_timeouts(device, max_distance)
+            add_interface_to_device_node(node, short_net_name, network_info, addresses[index])
             
     # STA devices & and interfaces    
-    wifi_helper = ns3.WifiHelper.Default()
-    wifi_helper.SetRemoteStationManager ("ns3::ConstantRateWifiManager",
-        "DataMode", ns3.StringValue(ns3_mode),
-        "RtsCtsThreshold", ns3.StringValue("2200"))
-            
-    mac = ns3.NqosWifiMacHelper.Default()   
     ssid = ns3.Ssid("%s%d" % (short_net_name[:5], net_index))
-    mac.SetType("ns3::QstaWifiMac", 
+    wifi.sta_mac.SetType("ns3::QstaWifiMac", 
         "Ssid", ns3.SsidValue(ssid),
         "ActiveProbing", ns3.BooleanValue(False))
-        
-    for terminal_member in terminal_members:
-        configure_node(wifi_helper, terminal_member)
+    configure_nodes(wifi.sta, wifi.sta_mac, terminal_members)
                     
     # AP devices & interfaces
-    wifi_helper = ns3.WifiHelper.Default()
-    mac = ns3.NqosWifiMacHelper.Default()
-    mac.SetType ("ns3::QapWifiMac", 
+    wifi.ap_mac.SetType("ns3::QapWifiMac", 
         "Ssid", ns3.SsidValue(ssid),
         "BeaconGeneration", ns3.BooleanValue(True),
         "BeaconInterval", ns3.TimeValue(ns3.Seconds(2.5)))        
-    configure_node(wifi_helper, node_member)
+    configure_nodes(wifi.ap, wifi.ap_mac, [node_member])
 
 def wimax_network(network_info, net_index, short_net_name, nodes, 
-                  get_node_from_ns3node, node_member, terminal_members,
-                  scheduler=ns3.WimaxHelper.SCHED_TYPE_RTPS):
-    """Configure a WiMax network (1 BS - n SSs)."""                      
+                  get_node_from_ns3node, node_member, terminal_members, subnet,
+                  scheduler=None):
+    """
+    Configure a WiMax network (1 BS - n SSs) with the addresses of a planned 
+    subnet. Scheduler defaults to ns3.WimaxHelper.SCHED_TYPE_RTPS.
+    """
+    if scheduler is None:
+        scheduler = ns3.WimaxHelper.SCHED_TYPE_RTPS
     logging.info("Network '%s': BS-node = '%s', SS-nodes = %s" % 
         (short_net_name, node_member, terminal_members))
         
     channel = ns3.SimpleOfdmWimaxChannel(ns3.SimpleOfdmWimaxChannel.FRIIS_PROPAGATION)
     wimax_helper = ns3.WimaxHelper()
-
-    address_helper = ns3.Ipv4AddressHelper()
-    netaddr = "10.1.%d.0" % net_index
-    address_helper.SetBase(ns3.Ipv4Address(netaddr), ns3.Ipv4Mask("255.255.255.0"))
     
-    def configure_node(name, device_type):
+    def configure_node(name, device_type, container):
         ns3_node = nodes[name].ns3_node
         # Change BW in PHY? (we'd need phy as parameter, not phy_type)
         device = wimax_helper.Install(ns3_node, device_type,
@@ -171,94 +375,176 @@ def wimax_network(network_info, net_index, short_net_name, nodes,
             modtype = getattr(ns3.WimaxPhy, "MODULATION_TYPE_" + wimax_mode.upper())
             device.SetModulationType(modtype)
         add_device_to_node(node, short_net_name, network_info, device, helper=wimax_helper)
-        container = ns3.NetDeviceContainer()
         container.Add(device)
-        interface = address_helper.Assign(container)
-        address = interface.GetAddress(0)
-        add_interface_to_device_node(node, short_net_name, network_info, address)
-        if device_type != ns3.WimaxHelper.DEVICE_TYPE_SUBSCRIBER_STATION:
-            return
         #return # uncomment this to configure a default UDP down-link service flow
-        
-    for terminal_member in terminal_members:
-        configure_node(terminal_member, ns3.WimaxHelper.DEVICE_TYPE_SUBSCRIBER_STATION)
-                    
-    configure_node(node_member, ns3.WimaxHelper.DEVICE_TYPE_BASE_STATION)
+    
+    # Devices of all members, addresses assigned in bulk (SSs first, as planned)
+    members = [(name, ns3.WimaxHelper.DEVICE_TYPE_SUBSCRIBER_STATION) 
+        for name in terminal_members]
+    members.append((node_member, ns3.WimaxHelper.DEVICE_TYPE_BASE_STATION))
+    devices = ns3.NetDeviceContainer()
+    for name, device_type in members:
+        configure_node(name, device_type, devices)
+    names = [name for (name, device_type) in members]
+    for name, address in zip(names, assign_addresses(devices, names, subnet)):
+        add_interface_to_device_node(nodes[name], short_net_name, network_info, address)
+
+def install_mobility(container, locations):
+    """
+    Install a constant-position mobility model in all nodes of a NodeContainer
+    (locations: list of (x, y) positions, in the same order as the container).
+    """
+    allocator = ns3.ListPositionAllocator()
+    for location in locations:
+        position = tuple(location) + (0,) 
+        allocator.Add(ns3.Vector(*position))
+    mobility = ns3.MobilityHelper()
+    mobility.SetMobilityModel("ns3::ConstantPositionMobilityModel")
+    mobility.SetPositionAllocator(allocator)
+    mobility.Install(container)
+
+def install_static_routes(nodes, plan, routes):
+    """
+    Install static routes (dictionary of pairs (node name, list of 
+    wwplan.routing.Route)) in the ns-3 nodes.
+    """
+    static_routing_helper = ns3.Ipv4StaticRoutingHelper()
+    for name, node_routes in routes.iteritems():
+        ipv4 = nodes[name].ns3_node.GetObject(ns3.Ipv4.GetTypeId())
+        static_routing = static_routing_helper.GetStaticRouting(ipv4)
+        interfaces = {}
+        for route in node_routes:
+            if route.net_name not in interfaces:
+                address = plan["networks"][route.net_name]["subnet"]["addresses"][name]
+                interfaces[route.net_name] = ipv4.GetInterfaceForAddress(ns3.Ipv4Address(address))
+            interface = interfaces[route.net_name]
+            static_routing.AddNetworkRouteTo(ns3.Ipv4Address(route.network),
+                ns3.Ipv4Mask(addressing.get_netmask(route.prefix)),
+                ns3.Ipv4Address(route.gateway), interface)
+
+class Ns3Backend(backend.Backend):
+    """Simulator backend using the ns-3 bindings."""
+    def __init__(self):
+        self.wifi_helpers = {}
+        self.ns3node_to_node = {}
+
+    def get_node_from_ns3node(self, ns3_node):
+        return self.ns3node_to_node[ns3_node.GetId()]
+
+    def create_node(self, name):
+        return ns3.Node()
+
+    def install_nodes(self, nodes):
+        self.ns3node_to_node.update((node.ns3_node.GetId(), node) for node in nodes)
+        container = ns3.NodeContainer()
+        for node in nodes:
+            container.Add(node.ns3_node)
+        stack = ns3.InternetStackHelper()
+        stack.Install(container)
+        install_mobility(container, [node.location for node in nodes])
+
+    def wifi_network(self, network_info, net_index, short_net_name, ns3_mode, nodes,
+                     node_member, terminal_members, subnet, links=None, max_distance=None):
+        wifi_network(network_info, net_index, short_net_name, ns3_mode, nodes,
+            self.get_node_from_ns3node, node_member, terminal_members, subnet,
+            self.wifi_helpers, links, max_distance)
+
+    def wimax_network(self, network_info, net_index, short_net_name, nodes,
+                      node_member, terminal_members, subnet, scheduler):
+        ns3_scheduler = getattr(ns3.WimaxHelper, "SCHED_TYPE_" + scheduler.upper())
+        wimax_network(network_info, net_index, short_net_name, nodes,
+            self.get_node_from_ns3node, node_member, terminal_members, subnet,
+            ns3_scheduler)
+
+    def install_static_routes(self, nodes, plan, routes):
+        install_static_routes(nodes, plan, routes)
+
+    def populate_global_routes(self):
+        ns3.Ipv4GlobalRoutingHelper.PopulateRoutingTables()
 
-def create_network(netinfo):
-    """Create a network Struct from a RadioMobile parsed text report."""
+    def install_application(self, network, app_type, options):
+        # ns3_lib imports this module, import it on use
+        from wwplan import ns3_lib
+        ns3_lib.get_available_applications()[app_type](network, **options)
+
+def create_network(netinfo, previous_plan=None, routing="global", backend=None):
+    """
+    Create a network Struct from a RadioMobile parsed text report.
+    
+    The plan of the network (see wwplan.plan) is stored in network.plan. Pass
+    it as previous_plan when creating the network for a modified netinfo, 
+    so the planning of the unchanged networks is reused.
+    
+    Routing mode (see ROUTING_MODES) is global (SPF computation over the
+    simulated topology) or static (routes computed from the plan).
+    
+    Simulator objects are created by backend (default: Ns3Backend).
+    """
+    if routing not in ROUTING_MODES:
+        raise ValueError, "Unknown routing mode: %s" % routing
+    backend = backend or Ns3Backend()
     nodes = {}
     for name, attrs in netinfo["units"].iteritems():
-        node = lib.Struct("Node", 
-            name=name,
+        node = Node(name=name,
             location=attrs["location"], 
-            ns3_node=ns3.Node(), 
+            ns3_node=backend.create_node(name), 
             devices={})
         nodes[name] = node
-        
-    ns3node_to_node = dict((node.ns3_node.GetId(), node) for node in nodes.values())
-    def get_node_from_ns3node(ns3_node):
-        return ns3node_to_node[ns3_node.GetId()]
-
-    # Internet stack
-    stack = ns3.InternetStackHelper()
-    for name, node in nodes.iteritems():
-        stack.Install(node.ns3_node)
+
+    # Internet stack & mobility (single install pass over all nodes)
+    all_nodes = nodes.values()
+    backend.install_nodes(all_nodes)
+    spatial_index = spatial.SpatialIndex((node.name, node.location) for node in all_nodes)
+    ap_names = sorted(set(network["node"]["name"] for network in netinfo["networks"].itervalues()))
+    plan = wwplan.plan.create_plan(netinfo, previous_plan, spatial_index)
     
     networks = {}
-    for net_index, (net_name, network) in enumerate(netinfo["networks"].iteritems()):
+    for net_name, network in netinfo["networks"].iteritems():
         # Nodes
-        node = network["node"]
-        node_member = node["name"]        
-        terminal_members = [terminal["name"] for terminal in network["terminals"]]  
-        ap_node = nodes[node_member].ns3_node
-        sta_nodes = ns3.NodeContainer()            
-        for name in terminal_members:
-            sta_nodes.Add(nodes[name].ns3_node)
+        network_plan = plan["networks"][net_name]
+        net_index = network_plan["net_index"]
+        node_member = network_plan["node"]        
+        terminal_members = network_plan["terminals"]
         
-        networks[name] = lib.Struct("network", node=node_member, terminals=terminal_members)
+        networks[net_name] = lib.Struct("network", node=node_member, terminals=terminal_members)
         mode = network["mode"]
         network_info = dict((d["name"], d) for d in [network["node"]] + network["terminals"])
                      
         # Configure WiFi or WiMax devices
         if mode["standard"].startswith("wifi"):
-            wifi_network(network_info, net_index, net_name, mode["wifi_mode"], nodes, 
-                         get_node_from_ns3node, node_member, terminal_members)
+            backend.wifi_network(network_info, net_index, net_name, mode["wifi_mode"], 
+                nodes, node_member, terminal_members, network_plan["subnet"],
+                network.get("links"), network_plan["max_distance"])
         elif mode["standard"].startswith("wimax"):
-            scheduler = getattr(ns3.WimaxHelper, "SCHED_TYPE_" + mode["wimax_scheduler"].upper())
-            wimax_network(network_info, net_index, net_name, nodes, 
-                          get_node_from_ns3node, node_member, terminal_members,
-                          scheduler)
+            backend.wimax_network(network_info, net_index, net_name, nodes, 
+                node_member, terminal_members, network_plan["subnet"], 
+                mode["wimax_scheduler"])
         else:
-            raise ValueError, ("Network name must be 'name [wifi_with_ns3_mode" +
-                              "| wimax-scheduler]': %s") % ns3_mode
-
-        # Mobility
-        mobility = ns3.MobilityHelper()
-        mobility.SetMobilityModel("ns3::ConstantPositionMobilityModel")
-                                                        
-        for member in [node_member] + terminal_members:
-            node = nodes[member]
-            allocator = ns3.ListPositionAllocator()
-            position = tuple(node.location) + (0,) 
-            #position = (0, 0, 0) # debug
-            allocator.Add(ns3.Vector(*position))
-            mobility.SetPositionAllocator(allocator)
-            mobility.Install(node.ns3_node)
+            raise ValueError, "Network '%s': mode standard must be wifi or wimax: %s" % \
+                (net_name, mode["standard"])
     
-    ns3.Ipv4GlobalRoutingHelper.PopulateRoutingTables()    
-    return lib.Struct("Network", nodes=nodes, networks=networks)
+    if routing == "static":
+        backend.install_static_routes(nodes, plan, wwplan.routing.get_routes(plan))
+    else:
+        backend.populate_global_routes()
+    return lib.Struct("Network", nodes=nodes, networks=networks, plan=plan,
+        ip2info=get_ip2info(netinfo, plan), address_index=get_address_index(nodes),
+        spatial_index=spatial_index, 
+        ap_index=spatial_index.subset(ap_names), backend=backend)
 
-def create_network_from_report_file(filename):
+def create_network_from_report_file(filename, previous_plan=None, routing="global",
+                                    backend=None):
     """Create a network Struct from a RadioMobile text-report filename."""
-    report = radiomobile.parse_report(filename)
-    netinfo = wwplan.netinfo.get_netinfo_from_report(report)
-    logging.debug("Netinfo YML contents:")
-    for line in yaml.dump(netinfo).splitlines():
-        logging.debug("Netinfo: %s" % line.rstrip())
-    return create_network(netinfo)
-
-def create_network_from_yaml_file(yamlfile):
+    netinfo = wwplan.netinfo.get_netinfo_from_report_file(filename)
+    if logging.getLogger().isEnabledFor(logging.DEBUG):
+        logging.debug("Netinfo YML contents:")
+        for line in wwplan.netinfo.dump_yaml(netinfo).splitlines():
+            logging.debug("Netinfo: %s" % line.rstrip())
+    return create_network(netinfo, previous_plan, routing, backend)
+
+def create_network_from_yaml_file(yamlfile, previous_plan=None, routing="global",
+                                  backend=None):
     """Create a network Struct from a YAML netinfo file."""
-    netinfo = yaml.load(open(yamlfile).read())
-    return create_network(netinfo)
+    netinfo = wwplan.netinfo.load_yaml_file(yamlfile)
+    wwplan.netinfo.validate_netinfo(netinfo)
+    return create_network(netinfo, previous_plan, routing, backend)
@@ -1,10 +1,11 @@
 #!/usr/bin/python
 import sys
-import ns3
+from wwplan.ns3_module import ns3
 import optparse
 import logging
 
-from wwplan import lib
+from wwplan import flowstats
+from wwplan import results
 from wwplan import network as wwnetwork
 
 ### Plots
@@ -16,18 +17,22 @@ def get_available_plots():
     }
 
 def create_througput_gnuplot(monitor_info, title, filename, flow_ids=None, image_format="png"):
-    """Create Gnuplot PLT file for a saved FlowStats."""  
+    """
+    Create Gnuplot PLT file for the flow samples of a monitor (measured 
+    points only, see flowstats.FlowSeries.get_measured).
+    """
     gnuplot = ns3.Gnuplot("%s.%s" % (filename, image_format), title)
     gnuplot.SetLegend("Time (seconds)", "Throughput (Mbps)")    
-    flow_stats_steps = monitor_info["flow_stats_steps"]
-    flow_ids = flow_ids or flow_stats_steps.keys()
+    flow_samples = monitor_info["flow_samples"]
+    flow_ids = flow_ids or flow_samples.keys()
     for flow_id in flow_ids:
         dataset = ns3.Gnuplot2dDataset("Flow %d" % flow_id)
         dataset.SetStyle(ns3.Gnuplot2dDataset.LINES)
-        pairs = flow_stats_steps[flow_id]
-        dataset.Add(pairs[0][0], 0)
-        for (time_x, y) in get_flow_stats_deltas(pairs, "rxBytes"):
-            dataset.Add(time_x, 8 * y / 1e6)
+        series = flow_samples[flow_id]
+        dataset.Add(series.get_times()[0], 0)
+        times, throughputs = flowstats.get_throughput(series, measured=True)
+        for (time_x, y) in zip(times.tolist(), (throughputs / 1e6).tolist()):
+            dataset.Add(time_x, y)
         gnuplot.AddDataset(dataset)
     pltfilename = "%s.plt" % filename
     logging.info("created gnuplot (%s) for %d flows (%s): %s" % 
@@ -36,38 +41,41 @@ def create_througput_gnuplot(monitor_info, title, filename, flow_ids=None, image
 
 ### Monitoring
 
-def enable_monitor(network, interval=None):
-    """Enable FlowMonitor and return a structure with state."""
-    def _ip2info_pairs():
-        for node_name, node_attrs in network.nodes.iteritems():
-            for device_name, device_attrs in node_attrs.devices.iteritems():
-                info = dict(device_name=device_name, node_name=node_name)
-                yield str(device_attrs.interfaces[0].address), info
-    def _monitor_step(flow_stats_steps):
-        """Called every 'interval' seconds. Save flow-stats for later processing."""
+def enable_monitor(network, interval=None, max_samples=None, delta=False, batch=1):
+    """
+    Enable FlowMonitor and return a structure with state. If interval is
+    given, the flow counters are sampled every interval seconds into 
+    flowstats.FlowSamples (with at most max_samples per flow, and 
+    delta-encoded if delta is True). Without max_samples the series grow
+    with the simulation time (memory is not bounded).
+    
+    With batch > 1, the simulator calls Python (and copies the flow stats)
+    only every batch intervals, and the series are interpolated back to
+    the interval resolution. Samples after the last batch are not taken.
+    The interpolated points are not measurements: counters grow linearly
+    between samples, so rates within a batch are the batch average. 
+    FlowSeries.get_measured (and the "measured" column of the exported
+    series, see wwplan.results) marks the sampled points.
+    """
+    def _monitor_step(flow_samples):
+        """Called every 'interval * batch' seconds. Save flow counters for later processing."""
         simtime = ns3.Simulator.Now().GetSeconds()            
-        for flow_id, flow_stats in monitor.GetFlowStats():
-            flow_stats_steps.setdefault(flow_id, []).append((simtime, flow_stats))
-        ns3.Simulator.Schedule(ns3.Seconds(interval), _monitor_step, flow_stats_steps)
+        flow_samples.add(simtime, monitor.GetFlowStats())
+        ns3.Simulator.Schedule(ns3.Seconds(interval * batch), _monitor_step, flow_samples)
                 
     flowmon_helper = ns3.FlowMonitorHelper()
     monitor = flowmon_helper.InstallAll()
-    ip2info = dict(_ip2info_pairs())
-    flow_stats_steps = {}
+    ip2info = network.ip2info
+    address_index = network.address_index
+    resolution = (interval if batch > 1 else None)
+    flow_samples = flowstats.FlowSamples(max_samples, delta, resolution)
     if interval is not None:
-        ns3.Simulator.Schedule(ns3.Seconds(interval), _monitor_step, flow_stats_steps)
+        ns3.Simulator.Schedule(ns3.Seconds(interval), _monitor_step, flow_samples)
     monitor_info = dict(helper=flowmon_helper, monitor=monitor, 
-        ip2info=ip2info, flow_stats_steps=flow_stats_steps)
+        ip2info=ip2info, address_index=address_index, flow_samples=flow_samples)
     return monitor_info
 
-def get_flow_stats_deltas(pairs, attr):
-    """Yield pairs (time, value) for increments in input pairs using attribute 'attr'."""
-    for (start_time, fs1), (end_time, fs2) in lib.pairwise(pairs):
-        delta = end_time - start_time
-        value = (getattr(fs2, attr) - getattr(fs1, attr)) / delta
-        yield end_time, value
-
-def print_stats(output, flow_id, flow_stats, flow_stats_steps, show_histograms):
+def print_stats(output, flow_id, flow_stats, flow_samples, show_histograms):
     """
     Return some info (Rx/Tx bytes/packets/throughput, lost packets,
     mean delay/jitter/hopcount values, histograms) for flow-stats objects.
@@ -110,31 +118,73 @@ def print_stats(output, flow_id, flow_stats, flow_stats_steps, show_histograms):
     for reason, drops in enumerate(st.packetsDropped):
         output(1, "Packets dropped by reason %d: %d packets" % (reason, drops))
         
-    if flow_id in flow_stats_steps:
-        result = ["%s=%0.2f" % (delta, 8.0*value/1e6) for (delta, value) in 
-                  get_flow_stats_deltas(flow_stats_steps[flow_id], "rxBytes")]
+    if flow_id in flow_samples:
+        times, throughputs = flowstats.get_throughput(flow_samples[flow_id], measured=True)
+        result = ["%s=%0.2f" % (time_x, value) for (time_x, value) in 
+                  zip(times.tolist(), (throughputs / 1e6).tolist())]
         output(1, "Rx Throughput steps (Mbps): %s" % ", ".join(result))
 
 def print_monitor_results(monitor_info, show_histograms=False, stream=sys.stdout):
     """Print info about flow stats in simulation."""    
     def output(indent_level, line):
         stream.write(" "*(2*indent_level) + line + "\n")
+    flow_samples = monitor_info["flow_samples"]
+    for flow_id, flow_stats, t, source, dest in get_flows(monitor_info):
+        proto = {6: 'TCP', 17: 'UDP'}.get(t.protocol, "PROTOCOL-UNKNOWN")
+        args = (flow_id, proto, source["address"], t.sourcePort, source["node_name"], 
+                source["device_name"], dest["address"], t.destinationPort, 
+                dest["node_name"], dest["device_name"])
+        output(0, "Flow %d (%s) - %s/%s (%s:%s) --> %s/%d (%s:%s)" % args)
+        print_stats(output, flow_id, flow_stats, flow_samples, show_histograms)
+
+def get_flows(monitor_info):
+    """
+    Return list of tuples (flow_id, flow_stats, five_tuple, source_info, 
+    dest_info) for the flows of a monitor. The classifier has no bulk 
+    lookup, so the first call makes one FindFlow per flow; five-tuples are
+    cached in monitor_info and later calls only look up new flows. Endpoints
+    (address, node_name, device_name) are resolved in one pass using the 
+    address index.
+    """
     monitor = monitor_info["monitor"]
-    flow_stats_steps = monitor_info["flow_stats_steps"]
     monitor.CheckForLostPackets()
+    flow_stats_pairs = list(monitor.GetFlowStats())
+    flow_tuples = monitor_info.setdefault("flow_tuples", {})
     classifier = monitor_info["helper"].GetClassifier()
-    for flow_id, flow_stats in monitor.GetFlowStats():
-        t = classifier.FindFlow(flow_id)
-        proto = {6: 'TCP', 17: 'UDP'}.get(t.protocol, "PROTOCOL-UNKNOWN")
-        source = monitor_info["ip2info"][str(t.sourceAddress)]
-        source_name, source_device = source["node_name"], source["device_name"]
-        dest = monitor_info["ip2info"][str(t.destinationAddress)]
-        dest_name, dest_device = dest["node_name"], dest["device_name"]
-        args = (flow_id, proto, t.sourceAddress, t.sourcePort, source_name, source_device, 
-                t.destinationAddress, t.destinationPort, dest_name, dest_device)
-        output(0, "Flow %d (%s) - %s/%s (%s:%s) --> %s/%d (%s:%s)" % args)
-        print_stats(output, flow_id, flow_stats, flow_stats_steps, show_histograms)
+    for flow_id, flow_stats in flow_stats_pairs:
+        if flow_id not in flow_tuples:
+            flow_tuples[flow_id] = classifier.FindFlow(flow_id)
+    tuples = [flow_tuples[flow_id] for (flow_id, flow_stats) in flow_stats_pairs]
+    address_index = monitor_info["address_index"]
+    sources = address_index.resolve(t.sourceAddress for t in tuples)
+    dests = address_index.resolve(t.destinationAddress for t in tuples)
+    return [(flow_id, flow_stats, t, source, dest) for ((flow_id, flow_stats), t, source, dest)
+        in zip(flow_stats_pairs, tuples, sources, dests)]
         
+def get_flow_summaries(monitor_info):
+    """Return list of flow summaries (dictionaries, see results.FLOW_FIELDS)."""
+    flows = []
+    for flow_id, st, t, source, dest in get_flows(monitor_info):
+        flows.append(dict(
+            flow_id=flow_id, 
+            protocol={6: 'TCP', 17: 'UDP'}.get(t.protocol, "PROTOCOL-UNKNOWN"),
+            source_address=source["address"], source_port=t.sourcePort,
+            source_node=source["node_name"], source_device=source["device_name"],
+            destination_address=dest["address"], destination_port=t.destinationPort,
+            destination_node=dest["node_name"], destination_device=dest["device_name"],
+            tx_bytes=st.txBytes, rx_bytes=st.rxBytes, 
+            tx_packets=st.txPackets, rx_packets=st.rxPackets,
+            lost_packets=st.lostPackets, delay_sum=st.delaySum.GetSeconds(),
+            jitter_sum=st.jitterSum.GetSeconds(), times_forwarded=st.timesForwarded,
+            first_tx=st.timeFirstTxPacket.GetSeconds(), 
+            last_rx=st.timeLastRxPacket.GetSeconds()))
+    return flows
+
+def save_monitor_results(monitor_info, filename):
+    """Save flow summaries and sampled series to a CSV or NPZ file (see wwplan.results)."""
+    results.save_results(filename, get_flow_summaries(monitor_info), 
+        monitor_info["flow_samples"])
+
 def save_monitor_xmldata(monitor_info, filename):
     """Save flow-monitor XML to filename."""
     monitor_info["monitor"].SerializeToXmlFile(filename, True, True)
@@ -316,14 +366,19 @@ def simulation_main(args, simulation, help):
       default=0, help='Increase verbose level)')
     parser.add_option('-r', '--report', dest='report', 
       default=None, help='Use a Radio Mobile report file')
+    parser.add_option('', '--routing', dest='routing', type="choice",
+      choices=wwnetwork.ROUTING_MODES, default="global",
+      help='Routing mode: %s (default: global)' % ", ".join(wwnetwork.ROUTING_MODES))
     options, args0 = parser.parse_args(args)
     set_logging_level(options.vlevel)
 
     if options.report:
-        network = wwnetwork.create_network_from_report_file(options.report)    
+        network = wwnetwork.create_network_from_report_file(options.report, 
+            routing=options.routing)
     elif len(args0) == 1:
         filename, = args0
-        network = wwnetwork.create_network_from_yaml_file(filename)
+        network = wwnetwork.create_network_from_yaml_file(filename, 
+            routing=options.routing)
     else:
         parser.print_help()
         return 2                
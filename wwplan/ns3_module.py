@@ -0,0 +1,44 @@
+"""
+Lazy access to the ns-3 Python bindings.
+
+Modules use the ns3 proxy instead of importing the bindings, which are
+only loaded on the first attribute access (so tools that do not simulate
+start fast and run without ns-3):
+
+>>> from wwplan.ns3_module import ns3
+>>> node = ns3.Node()
+
+A stand-in module (i.e. for tests) can be set with set_ns3.
+"""
+from __future__ import absolute_import
+
+_module = None
+
+def get_ns3():
+    """Return the ns3 module, importing the bindings on first use."""
+    global _module
+    if _module is None:
+        import ns3 as module
+        _module = module
+    return _module
+
+def set_ns3(module):
+    """Use module as ns3 (None to load the bindings again on next use)."""
+    global _module
+    _module = module
+
+def is_loaded():
+    """Return True if the ns3 module has been loaded (or set)."""
+    return _module is not None
+
+class Ns3Proxy(object):
+    """Proxy object to the attributes of the ns3 module."""
+    __slots__ = ()
+
+    def __getattr__(self, name):
+        return getattr(get_ns3(), name)
+
+    def __repr__(self):
+        return "<Ns3Proxy: %s>" % ("loaded" if is_loaded() else "not loaded")
+
+ns3 = Ns3Proxy()
@@ -0,0 +1,138 @@
+"""
+Network plan: the serializable (ns-3 independent) values computed from a
+netinfo to build a network.
+
+A plan is a dictionary with the following keys:
+
+    * units: dictionary of pairs (name, {"location": [x, y]}).
+    * networks: dictionary of pairs (name, network_plan). Network plan keys:
+        * net_index: index of the network (used to build its addresses).
+        * node: name of the AP/BS node.
+        * terminals: list of terminal names.
+        * max_distance: maximum distance (meters) between node and terminals.
+        * subnet: dictionary with keys network (address), prefix (length) and
+          addresses (pairs of member name and address). See wwplan.addressing.
+        * signature: signature (JSON string) of the netinfo entry of the 
+          network and the units of its members the plan was computed from.
+
+When a netinfo changes (i.e. in a parameter sweep), create_plan reuses the
+plan of the networks that did not change (as the same objects, nothing is
+copied) and only computes the changed ones:
+
+>>> plan1 = create_plan(netinfo1)
+>>> plan2 = create_plan(netinfo2, previous=plan1)
+>>> diff = diff_netinfo(netinfo1, netinfo2)
+"""
+import json
+import logging
+
+from wwplan import lib
+from wwplan import spatial
+from wwplan import addressing
+
+def get_network_members(network):
+    """Return list of member names (node + terminals) of a netinfo network."""
+    return [network["node"]["name"]] + [t["name"] for t in network["terminals"]]
+
+def get_network_signature(network, units):
+    """
+    Return the signature (JSON string) of the netinfo of a network and the 
+    units of its members (used to detect changes). Keys are not sorted (the
+    C encoder is used): equal netinfos with a different dictionary ordering
+    only miss the reuse of their plans.
+    """
+    members = get_network_members(network)
+    return json.dumps([network, [(name, units[name]) for name in members]])
+
+def diff_netinfo(netinfo1, netinfo2):
+    """
+    Return a Struct with the differences between two netinfos. Attributes
+    (lists of sorted names): added, removed, changed and unchanged networks.
+    A network also changes when any of the units of its members changes.
+    """
+    networks1, networks2 = netinfo1["networks"], netinfo2["networks"]
+    names1, names2 = set(networks1), set(networks2)
+    changed, unchanged = lib.partition(sorted(names1 & names2), lambda name:
+        get_network_signature(networks1[name], netinfo1["units"]) !=
+        get_network_signature(networks2[name], netinfo2["units"]))
+    return lib.Struct("NetinfoDiff",
+        added=sorted(names2 - names1),
+        removed=sorted(names1 - names2),
+        changed=changed,
+        unchanged=unchanged)
+
+def get_units_spatial_index(units):
+    """Return a spatial.SpatialIndex for the locations of netinfo units."""
+    return spatial.SpatialIndex((name, unit["location"]) for (name, unit) in units.iteritems())
+
+def create_network_plan(net_name, network, units, net_index, spatial_index, 
+                        signature=None):
+    """Return the plan (dictionary) for a netinfo network."""
+    node = network["node"]["name"]
+    terminals = [terminal["name"] for terminal in network["terminals"]]
+    return {
+        "net_index": net_index,
+        "node": node,
+        "terminals": terminals,
+        "max_distance": spatial_index.max_distance(node, terminals),
+        "signature": (signature or get_network_signature(network, units)),
+    }
+
+def get_subnet_hosts(network_plan):
+    """Return members of a network in the order their addresses are assigned."""
+    return network_plan["terminals"] + [network_plan["node"]]
+
+def create_plan(netinfo, previous=None, spatial_index=None, 
+                base_network=addressing.DEFAULT_BASE_NETWORK):
+    """
+    Return a plan for netinfo. Plans of networks in the previous plan whose
+    netinfo (and the units of their members) did not change are reused,
+    and so are their network indexes and subnets. 
+    
+    spatial_index is the index of the netinfo units (if not given, an index
+    of the members of the networks to compute is built). Subnets are 
+    allocated from base_network (pair address, prefix length).
+    """
+    units = netinfo["units"]
+    previous_networks = (previous["networks"] if previous else {})
+    networks = {}
+    signatures = {}
+    for net_name, network in netinfo["networks"].iteritems():
+        signature = get_network_signature(network, units)
+        network_plan = previous_networks.get(net_name)
+        if network_plan and network_plan.get("signature") == signature:
+            networks[net_name] = network_plan
+        else:
+            signatures[net_name] = signature
+
+    if signatures and spatial_index is None:
+        names = set(name for net_name in signatures
+            for name in get_network_members(netinfo["networks"][net_name]))
+        spatial_index = get_units_spatial_index(dict((name, units[name]) for name in names))
+    used_indexes = set(network_plan["net_index"] for network_plan in networks.itervalues())
+    allocator = addressing.SubnetAllocator(*base_network)
+    for network_plan in networks.itervalues():
+        subnet = network_plan["subnet"]
+        allocator.reserve(subnet["network"], subnet["prefix"])
+    free_indexes = (index for index in xrange(len(netinfo["networks"]) + len(used_indexes))
+        if index not in used_indexes)
+    new_networks = {}
+    # Sorted by name, so a netinfo always gets the same indexes and subnets
+    for net_name, network in sorted(netinfo["networks"].iteritems()):
+        if net_name in networks:
+            continue
+        net_index = next(free_indexes)
+        new_networks[net_name] = create_network_plan(net_name, network, units, 
+            net_index, spatial_index, signatures[net_name])
+    subnets = addressing.allocate_subnets(allocator, [(net_name, get_subnet_hosts(network_plan))
+        for (net_name, network_plan) in sorted(new_networks.iteritems(), 
+            key=lambda (net_name, network_plan): network_plan["net_index"])])
+    for net_name, network_plan in new_networks.iteritems():
+        network_plan["subnet"] = subnets[net_name]
+    networks.update(new_networks)
+
+    logging.debug("Plan: %d networks reused, %d computed" %
+        (len(used_indexes), len(networks) - len(used_indexes)))
+    plan_units = dict((name, {"location": list(unit["location"])})
+        for (name, unit) in units.iteritems())
+    return {"units": plan_units, "networks": networks}
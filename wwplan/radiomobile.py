@@ -19,12 +19,87 @@ Network Struct attributes:
 """
 import re
 import sys
+import itertools
 from datetime import datetime
 import math
 
+import numpy
+
 from wwplan import lib
 from wwplan.odict import odict
 
+# Increase when the parsed report structure changes (invalidates cached reports)
+PARSER_VERSION = 4
+
+class Unit(lib.Record):
+    """Active unit of a report."""
+    __slots__ = ("name", "location", "elevation", "location_coords", "location_meters")
+
+class System(lib.Record):
+    """System of a report."""
+    __slots__ = ("name", "pwr_tx", "loss", "loss_plus", "rx_thr", "ant_g", "ant_type")
+    _aliases = {"loss_(+)": "loss_plus"}
+
+class NetMember(lib.Record):
+    """Member of a net (grid: its row in the quality grid)."""
+    __slots__ = ("net_members", "role", "system", "antenna", "grid")
+
+class Link(lib.Record):
+    """Link between two members of a net."""
+    __slots__ = ("peers", "quality", "distance")
+
+class LinkTable(object):
+    """
+    Columnar table of links. Peers are stored as pairs of indexes in the 
+    names list (interned unit names), qualities and distances as arrays. 
+    Report-wide tables also have a nets column (indexes in net_names).
+    
+    Iterating the table yields Link records, so it can be used in place
+    of a list of links.
+    
+    >>> table = get_report_link_table(report)
+    >>> good_links = table[(table.quality >= 60) & (table.distance < 20000)]
+    """
+    def __init__(self, names, peers, quality, distance, nets=None, net_names=None):
+        self.names = names
+        self.peers = numpy.asarray(peers, dtype=numpy.int32).reshape(-1, 2)
+        self.quality = numpy.asarray(quality, dtype=numpy.int32)
+        self.distance = numpy.asarray(distance, dtype=numpy.int32)
+        self.nets = (numpy.asarray(nets, dtype=numpy.int32) if nets is not None else None)
+        self.net_names = net_names
+
+    def __len__(self):
+        return len(self.quality)
+
+    def __iter__(self):
+        names = self.names
+        columns = [self.peers.tolist(), self.quality.tolist(), self.distance.tolist()]
+        for (index1, index2), quality, distance in itertools.izip(*columns):
+            yield Link(peers=(names[index1], names[index2]), 
+                quality=quality, distance=distance)
+
+    def __getitem__(self, index):
+        """Return a Link for an integer index, a new LinkTable otherwise (slice/mask)."""
+        if isinstance(index, (int, long, numpy.integer)):
+            index1, index2 = self.peers[index].tolist()
+            return Link(peers=(self.names[index1], self.names[index2]), 
+                quality=int(self.quality[index]), distance=int(self.distance[index]))
+        nets = (self.nets[index] if self.nets is not None else None)
+        return LinkTable(self.names, self.peers[index], self.quality[index],
+            self.distance[index], nets, self.net_names)
+
+    def __repr__(self):
+        return "<LinkTable> %d links" % len(self)
+
+    def filter(self, min_quality=None, max_distance=None):
+        """Return a LinkTable with the links that match quality/distance limits."""
+        mask = numpy.ones(len(self), dtype=bool)
+        if min_quality is not None:
+            mask &= (self.quality >= min_quality)
+        if max_distance is not None:
+            mask &= (self.distance <= max_distance)
+        return self[mask]
+
 def get_distance(origin, destination):
     """
     Calculate distance (in meters) between two WGS84 coordinates using 
@@ -54,6 +129,36 @@ def get_position_from_reference(coordinates, reference):
     y = int(round(r1 * (lat - lat0)))
     return (x, y)
 
+def get_distances(origins, destinations):
+    """
+    Vectorized version of get_distance. Take two sequences of WGS84 
+    coordinates (lat, lon) and return an array of distances (in meters).
+    """
+    lat1, lon1 = numpy.asarray(origins, dtype=float).reshape(-1, 2).T
+    lat2, lon2 = numpy.asarray(destinations, dtype=float).reshape(-1, 2).T
+    radius = 6371
+    sin, cos, rad = numpy.sin, numpy.cos, numpy.radians
+    dlat = rad(lat2 - lat1)
+    dlon = rad(lon2 - lon1)
+    a = sin(dlat/2)**2 + (cos(rad(lat1)) * cos(rad(lat2)) * sin(dlon/2)**2)
+    c = 2 * numpy.arctan2(numpy.sqrt(a), numpy.sqrt(1 - a))
+    d = radius * c
+    return (1000.0 * d).astype(int)
+
+def get_positions_from_reference(coordinates, reference):
+    """
+    Vectorized version of get_position_from_reference. Take a sequence of
+    coordinates (lat, lon) and return an array of (x, y) positions.
+    """
+    def _round(values):
+        # Round half away from zero, as the builtin round does
+        return (numpy.sign(values) * numpy.floor(numpy.abs(values) + 0.5)).astype(int)
+    lat, lon = numpy.radians(numpy.asarray(coordinates, dtype=float).reshape(-1, 2)).T
+    lat0, lon0, r1, r2 = reference
+    x = _round(r2 * math.cos(lat0) * (lon - lon0))
+    y = _round(r1 * (lat - lat0))
+    return numpy.column_stack([x, y])
+
 def get_reference(coordinates):
     """Calculate R1/R2 reference values to calculate relative positions."""
     lat0, lon0 = map(math.radians, coordinates)
@@ -85,12 +190,11 @@ def get_distance_between_locations(location1, location2):
     coord2 = get_lat_lon_from_string(location2)
     return get_distance(coord1, coord2)
 
-def create_odict_from_items(name, key, dictlst):
-    """Construct an ordered dictionary from a list of dictionaries."""
+def create_odict_from_items(record_class, key, dictlst):
+    """Construct an ordered dictionary of records from a list of dictionaries."""
     def _generator():
         for delement in dictlst:        
-            dvalues = dict((k, v) for (k, v) in delement.iteritems())
-            yield (delement[key], lib.Struct(name, **dvalues))
+            yield (delement[key], record_class(**delement))
     return odict(_generator())      
     
 def parse_header(lines):
@@ -98,6 +202,7 @@ def parse_header(lines):
     Check that the headers contain a valid RadioMobile identifier and return
     the generation report date.
     """     
+    lines = list(lines)
     if len(lines) != 3:
         raise ValueError, "Unknown header: %s" % lines
     metadata, title, generated_on = lines
@@ -110,7 +215,7 @@ def parse_header(lines):
 def parse_active_units(lines):
     """Return ordered dict containing (name, attributes) pairs for units."""
     headers = ["Name", "Location", "Elevation"]
-    units = create_odict_from_items("unit", "name", lib.parse_table(lines, headers))
+    units = create_odict_from_items(Unit, "name", lib.parse_table(lines, headers))
     if units:
         for name, unit in units.iteritems():
             unit.location = unit.location.replace("°", "d")            
@@ -118,17 +223,80 @@ def parse_active_units(lines):
             units[name].location_coords = list(coords)
             elevation = int(float(re.match("([\d.]+)", unit.elevation).group(1)))
             units[name].elevation = elevation 
-        unit1 = units.itervalues().next()
-        reference = get_reference(unit1.location_coords)
-        for name, unit in units.iteritems():
-            units[name].location_meters = \
-                list(get_position_from_reference(unit.location_coords, reference))        
+        coords = [unit.location_coords for unit in units.itervalues()]
+        reference = get_reference(coords[0])
+        positions = get_positions_from_reference(coords, reference)
+        for unit, position in zip(units.itervalues(), positions.tolist()):
+            unit.location_meters = position
     return units
             
 def parse_systems(lines):
     """Return orderect dict containing (name, attributes) pairs for systems."""
     headers = ["Name", "Pwr Tx", "Loss", "Loss (+)", "Rx thr.", "Ant. G.", "Ant. Type"]
-    return create_odict_from_items("system", "name", lib.parse_table(lines, headers))
+    return create_odict_from_items(System, "name", lib.parse_table(lines, headers))
+
+def parse_system_value(value):
+    """Return the number in a system/antenna field ("10,000W" -> 10.0, "-107,0dBm" -> -107.0)."""
+    match = re.match(r"\s*([-+]?[\d,.]+)", value)
+    if not match:
+        raise ValueError, "Invalid numeric value: %s" % value
+    return float(match.group(1).replace(",", "."))
+
+def get_system_budget(system, antenna_height=0.0):
+    """
+    Return dictionary with the link budget values of a system: tx_power (dBm),
+    loss (dB, line loss for an antenna height in meters), rx_threshold (dBm) 
+    and antenna_gain (dBi).
+    """
+    watts = parse_system_value(system.pwr_tx)
+    line_loss = parse_system_value(system.loss) + \
+        parse_system_value(system.loss_plus) * antenna_height
+    return dict(
+        tx_power=10 * math.log10(1000.0 * watts),
+        loss=line_loss,
+        rx_threshold=parse_system_value(system.rx_thr),
+        antenna_gain=parse_system_value(system.ant_g))
+
+# Quality legends of a net members grid whose values are the received level 
+# relative to the receiver threshold (dB). Other legends (i.e. "Quality = 50 -
+# number of resend") are not signal levels and give no path losses.
+SIGNAL_QUALITY_LEGEND = re.compile(r"(\bdB\b|rx level|signal level|field strength)", re.I)
+
+def is_signal_quality_legend(legend):
+    """Return True if a net quality legend describes a relative signal level (dB)."""
+    return bool(legend and SIGNAL_QUALITY_LEGEND.search(legend))
+
+def get_link_path_loss(quality, tx_budget, rx_budget):
+    """
+    Return the path loss (dB) of a link. Quality is the received level relative
+    to the receiver threshold (dB), as shown in the net members grid. Budgets are
+    dictionaries returned by get_system_budget.
+    """
+    rx_power = rx_budget["rx_threshold"] + quality
+    eirp = tx_budget["tx_power"] - tx_budget["loss"] + tx_budget["antenna_gain"]
+    return eirp + rx_budget["antenna_gain"] - rx_budget["loss"] - rx_power
+
+def get_member_budgets(net, systems):
+    """Return a dictionary of pairs (member name, system budget) for a net."""
+    def _get_budget(member):
+        height = parse_system_value(member.antenna)
+        return get_system_budget(systems[member.system], height)
+    return dict((name, _get_budget(member)) for (name, member) in net.net_members.iteritems())
+
+def get_net_link_losses(net, systems):
+    """
+    Return a list of pairs (peers, path_loss) for the links in a net, None
+    if the net qualities are not signal levels (see is_signal_quality_legend).
+    """
+    if not is_signal_quality_legend(net.quality_legend):
+        return None
+    budgets = get_member_budgets(net, systems)
+    return [(link.peers, get_link_path_loss(link.quality, 
+        budgets[link.peers[0]], budgets[link.peers[1]])) for link in net.links]
+
+def get_grid_row_items(row, grid_field):
+    """Return dictionary with the items of a net members row except the quality grid."""
+    return dict((k, v) for (k, v) in row.iteritems() if k != grid_field)
 
 def get_net_links(rows, grid_field, units):
     """Parse a quality grid and return dictionary with information.""" 
@@ -136,9 +304,9 @@ def get_net_links(rows, grid_field, units):
         s = "".join(lst).strip()
         return (int(s) if s else None)
     def clean_node(node):
-        items = dict((k, v) for (k, v) in node.iteritems() if not k.startswith("#"))
-        return lib.Struct("Node", **items)
+        return NetMember(**get_grid_row_items(node, grid_field))
     
+    links, peer_indexes = [], []
     for nrow, row in enumerate(rows[:-1]):
         qualities = map(get_quality, lib.grouper(3, row[grid_field][3:], ''))
         for npeer_row, quality in enumerate(qualities):
@@ -146,21 +314,32 @@ def get_net_links(rows, grid_field, units):
                 continue
             peer_row = rows[npeer_row]
             node1, node2 = map(clean_node, [row, peer_row])
-            location1 = units[node1.net_members].location
-            location2 = units[node2.net_members].location
-            distance = get_distance_between_locations(location1, location2)
-             
-            link = {            
+            links.append({            
                 "quality": quality,
                 "node1": node1,
                 "node2": node2,
-                "distance": distance,
-            }
-            yield link
+            })
+            peer_indexes.append((nrow, npeer_row))
+    if not links:
+        return
+    
+    # Coordinates index of net members (by row), parsed once by parse_active_units
+    coords = numpy.array([units[row["net_members"]].location_coords for row in rows])
+    indexes1, indexes2 = numpy.array(peer_indexes).T
+    distances = get_distances(coords[indexes1], coords[indexes2]).tolist()
+    for link, distance in zip(links, distances):
+        link["distance"] = distance
+        yield link
 
-def parse_active_nets(lines, units):
-    """Return an orderd dict with nets, each containing a list of links.""" 
-    nets_lines = list(lib.split_iter_of_consecutive(lines[1:], lambda s: not s.strip(), 2))
+def parse_active_nets(lines, units, link_table=False):
+    """
+    Return an orderd dict with nets, each containing a list of links 
+    (a LinkTable if link_table is True).
+    """ 
+    unit_indexes = dict((name, index) for (index, name) in enumerate(units))
+    unit_names = units.keys()
+    nets_lines = lib.split_iter_of_consecutive(itertools.islice(lines, 1, None), 
+        lambda s: not s.strip(), 2)
     nets = odict()
     for net_lines in lib.strip_iter_items(nets_lines):
         info = lib.strip_list(net_lines)
@@ -169,22 +348,27 @@ def parse_active_nets(lines, units):
           r"Net members:", r"\s.*Quality ="))
         table, quality_line = block[:-2], block[-1]
         max_quality = int(re.search("Quality = (\d+)", quality_line).group(1))
+        quality_legend = quality_line.strip()
         grid_field = re.match("Net members:\s*(.*?)\s*Role:", table[0]).group(1)
         grid_fields = ["Net members:", grid_field, "Role:", "System:", "Antenna:"]    
         rows = list(lib.parse_table(table, grid_fields, lambda s: not s.startswith('#')))
-        net_members = create_odict_from_items("net_member", "net_members", rows)        
+        members = (dict(get_grid_row_items(row, grid_field), grid=row[grid_field]) 
+            for row in rows)
+        net_members = create_odict_from_items(NetMember, "net_members", members)
         links = []
         for link in get_net_links(rows, grid_field, units):
             peers = (link["node1"].net_members, link["node2"].net_members)
-            link = lib.Struct("Link", 
-                peers=peers, 
+            link = Link(peers=peers, 
                 quality=link["quality"], 
                 distance=link["distance"])
             links.append(link)
+        if link_table:
+            links = create_link_table(links, unit_names, unit_indexes)
         nets[name] = lib.Struct("Network", name=name, 
             net_members=net_members,
             links=links, 
-            max_quality=max_quality)
+            max_quality=max_quality,
+            quality_legend=quality_legend)
     return nets                
 
 def get_units_for_network(net, role=None):
@@ -195,29 +379,92 @@ def get_units_for_network(net, role=None):
                 yield net_member
     return list(_generator())
                                 
-def parse_report(filename):
+def create_link_table(links, names, name_indexes=None):
+    """Return a LinkTable from Link records (names: list of unit names)."""
+    if name_indexes is None:
+        name_indexes = dict((name, index) for (index, name) in enumerate(names))
+    links = list(links)
+    return LinkTable(names, 
+        [[name_indexes[peer] for peer in link.peers] for link in links],
+        [link.quality for link in links], 
+        [link.distance for link in links])
+
+def get_report_link_table(report):
+    """Return a LinkTable with the links of all nets in a report."""
+    unit_names = report.units.keys()
+    unit_indexes = dict((name, index) for (index, name) in enumerate(unit_names))
+    tables = []
+    for net in report.nets.itervalues():
+        if isinstance(net.links, LinkTable) and net.links.names == unit_names:
+            tables.append(net.links)
+        else:
+            tables.append(create_link_table(net.links, unit_names, unit_indexes))
+    if not tables:
+        return LinkTable(unit_names, [], [], [], [], [])
+    nets = [numpy.repeat(index, len(table)) for (index, table) in enumerate(tables)]
+    return LinkTable(unit_names,
+        numpy.concatenate([table.peers for table in tables]),
+        numpy.concatenate([table.quality for table in tables]),
+        numpy.concatenate([table.distance for table in tables]),
+        numpy.concatenate(nets), report.nets.keys())
+
+def iter_report_sections(lines):
+    """
+    Yield pairs (section_key, lines_iterator) for the sections of a report.
+    
+    The first section (key "header") contains the lines before the first
+    separator. Lines are consumed lazily, so each lines iterator must be 
+    exhausted (or discarded) before the next section is requested.
+    """
+    groups = (group for (match, group) in 
+        itertools.groupby(lines, lambda s: s.startswith("---")) if not match)
+    header = next(groups, None)
+    if header is None:
+        raise ValueError, "Empty report"
+    yield "header", header
+    for title_lines in groups:
+        key = lib.keyify(lib.first(title_lines))
+        yield key, next(groups, iter([]))
+
+def parse_report(filename, link_table=False):
     """
     Read and parse a Radiomobile report.txt file.
     
+    The file is read incrementally and every section is dispatched to its
+    parser as it arrives, so only one section is kept in memory at a time.
+    If link_table is True, links of nets are stored in LinkTable objects.
+     
     >>> report = parse_report("report.txt")
     >>> report.nets
     >>> report.systems
     >>> report.units
     """
-    lines = open(filename).read().splitlines()
-    splitted_lines = list(lib.split_iter(lines, 
-      lambda s: s.startswith("---"), skip_sep=True))
-    generated_on = parse_header(splitted_lines[0])
-    sections = dict((lib.keyify(key[0]), val) for (key, val) in 
-      lib.grouper(2, splitted_lines[1:]))
+    sections = {}
+    parsers = {
+        "header": parse_header,
+        "general_information": list,
+        "active_units_information": parse_active_units,
+        "systems": parse_systems,
+        "active_nets_information": lambda lines: 
+            parse_active_nets(lines, sections["active_units_information"], link_table),
+    }
+    with open(filename, "U") as fd:
+        lines = (line.rstrip("\n") for line in fd)
+        for key, section_lines in iter_report_sections(lines):
+            if key == "active_nets_information" and "active_units_information" not in sections:
+                raise ValueError, "Active nets information found before active units"
+            if key in parsers and key not in sections:
+                sections[key] = parsers[key](section_lines)
+    missing = [key for key in parsers if key not in sections]
+    if missing:
+        raise ValueError, "Missing sections in report: %s" % ", ".join(sorted(missing))
     
-    units = parse_active_units(sections["active_units_information"])
     report = lib.Struct("RadioMobileReport",
-        generated_on=generated_on,
+        generated_on=sections["header"],
         general_information=sections["general_information"],
-        units=units,
-        systems=parse_systems(sections["systems"]),
-        nets=parse_active_nets(sections["active_nets_information"], units))
+        units=sections["active_units_information"],
+        systems=sections["systems"],
+        nets=sections["active_nets_information"])
     return report
 
 def main(args):    
@@ -0,0 +1,87 @@
+"""
+Recording backend: build networks without a simulator, recording the
+build as data (i.e. to test or profile the construction of large plans).
+
+>>> recorder = RecordingBackend()
+>>> network = create_network(netinfo, backend=recorder)
+>>> recorder.get_counts()
+{'create_node': 7, 'install_nodes': 1, 'wifi_network': 3, ...}
+"""
+import collections
+
+from wwplan import lib
+from wwplan import backend
+from wwplan import network as wwnetwork
+
+class RecordedNode(lib.Record):
+    """Node handle of the recording backend."""
+    __slots__ = ("name", "index")
+
+class RecordedDevice(lib.Record):
+    """Device handle of the recording backend."""
+    __slots__ = ("standard", "network", "node", "role")
+
+class RecordingBackend(backend.Backend):
+    """
+    Backend that creates no simulator objects. Calls are appended to
+    self.calls as pairs (method name, dictionary of arguments), and devices
+    and interfaces (with the planned addresses) are added to the nodes as
+    the ns-3 backend does.
+    """
+    def __init__(self):
+        self.calls = []
+        self.nodes_count = 0
+
+    def _record(self, method, **kwargs):
+        self.calls.append((method, kwargs))
+
+    def get_counts(self):
+        """Return a dictionary of pairs (method name, number of calls)."""
+        return dict(collections.Counter(method for (method, kwargs) in self.calls))
+
+    def _add_devices(self, standard, network_info, short_net_name, nodes,
+                     node_member, terminal_members, subnet):
+        roles = [(name, "terminal") for name in terminal_members] + [(node_member, "node")]
+        for name, role in roles:
+            node = nodes[name]
+            device = RecordedDevice(standard=standard, network=short_net_name,
+                node=name, role=role)
+            wwnetwork.add_device_to_node(node, short_net_name, network_info, device)
+            wwnetwork.add_interface_to_device_node(node, short_net_name,
+                network_info, subnet["addresses"][name])
+
+    def create_node(self, name):
+        self._record("create_node", name=name)
+        self.nodes_count += 1
+        return RecordedNode(name=name, index=self.nodes_count - 1)
+
+    def install_nodes(self, nodes):
+        self._record("install_nodes", names=[node.name for node in nodes],
+            locations=[tuple(node.location) for node in nodes])
+
+    def wifi_network(self, network_info, net_index, short_net_name, ns3_mode, nodes,
+                     node_member, terminal_members, subnet, links=None, max_distance=None):
+        self._record("wifi_network", net_index=net_index, network=short_net_name,
+            mode=ns3_mode, node=node_member, terminals=list(terminal_members),
+            subnet=subnet, links=len(links or []), max_distance=max_distance)
+        self._add_devices("wifi", network_info, short_net_name, nodes,
+            node_member, terminal_members, subnet)
+
+    def wimax_network(self, network_info, net_index, short_net_name, nodes,
+                      node_member, terminal_members, subnet, scheduler):
+        self._record("wimax_network", net_index=net_index, network=short_net_name,
+            scheduler=scheduler, node=node_member, terminals=list(terminal_members),
+            subnet=subnet)
+        self._add_devices("wimax", network_info, short_net_name, nodes,
+            node_member, terminal_members, subnet)
+
+    def install_static_routes(self, nodes, plan, routes):
+        for name, node_routes in sorted(routes.iteritems()):
+            self._record("install_static_routes", node=name,
+                routes=[route._asdict() for route in node_routes])
+
+    def populate_global_routes(self):
+        self._record("populate_global_routes")
+
+    def install_application(self, network, app_type, options):
+        self._record("install_application", type=app_type, options=dict(options))
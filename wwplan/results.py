@@ -0,0 +1,107 @@
+"""
+Export simulation results (flow summaries and sampled time series) to
+columnar files: CSV or NumPy NPZ.
+
+Flow summaries are dictionaries with keys FLOW_FIELDS (see
+ns3_lib.get_flow_summaries); time series are flowstats.FlowSamples. The
+"measured" column of the series is 0 for the points interpolated between
+samples (see ns3_lib.enable_monitor with batch > 1), 1 for samples.
+
+>>> save_results("results.npz", flows, flow_samples)
+>>> data = numpy.load("results.npz")
+>>> data["flow_rx_bytes"], data["series_time"]
+"""
+import os
+import csv
+
+import numpy
+
+from wwplan import flowstats
+
+# Fields of a flow summary (times and delays in seconds)
+FLOW_FIELDS = (
+    "flow_id", "protocol",
+    "source_address", "source_port", "source_node", "source_device",
+    "destination_address", "destination_port", "destination_node", "destination_device",
+    "tx_bytes", "rx_bytes", "tx_packets", "rx_packets", "lost_packets",
+    "delay_sum", "jitter_sum", "times_forwarded", "first_tx", "last_rx",
+)
+
+# Counter columns of the time series (named as in FLOW_FIELDS, see flowstats.COUNTERS)
+SERIES_COUNTER_FIELDS = ("rx_bytes", "tx_bytes", "rx_packets", "tx_packets", 
+                         "lost_packets", "delay_sum")
+
+# Columns of the time series
+SERIES_FIELDS = ("flow_id", "time", "measured") + SERIES_COUNTER_FIELDS
+
+def get_series_columns(flow_samples):
+    """
+    Return a dictionary of pairs (SERIES_FIELDS name, array) with the series
+    of all flows concatenated (sorted by flow_id, then time). delay_sum
+    is converted to seconds, measured is 1 for samples and 0 for 
+    interpolated points.
+    """
+    flow_ids = sorted(flow_samples)
+    times = [flow_samples[flow_id].get_times() for flow_id in flow_ids]
+    values = [flow_samples[flow_id].get_values() for flow_id in flow_ids]
+    measured = [flow_samples[flow_id].get_measured() for flow_id in flow_ids]
+    ncounters = len(flowstats.COUNTERS)
+    all_values = (numpy.concatenate(values) if values else
+        numpy.zeros((0, ncounters), dtype=numpy.int64))
+    columns = {
+        "flow_id": numpy.repeat(flow_ids, [len(t) for t in times]).astype(numpy.int64),
+        "time": (numpy.concatenate(times) if times else numpy.zeros(0)),
+        "measured": (numpy.concatenate(measured).astype(numpy.int8) if measured 
+            else numpy.zeros(0, dtype=numpy.int8)),
+    }
+    for name, column in zip(SERIES_COUNTER_FIELDS, all_values.T):
+        columns[name] = (column / 1e9 if name == "delay_sum" else column)
+    return columns
+
+def get_flow_columns(flows):
+    """Return a dictionary of pairs (FLOW_FIELDS name, array) for flow summaries."""
+    return dict((name, numpy.array([flow[name] for flow in flows]))
+        for name in FLOW_FIELDS)
+
+def get_series_filename(filename):
+    """Return the filename of the CSV time series for a CSV results filename."""
+    root, ext = os.path.splitext(filename)
+    return root + "-series" + ext
+
+def save_csv(filename, flows, flow_samples=None):
+    """
+    Save flow summaries to a CSV file and, if given, time series to a
+    second CSV file (see get_series_filename).
+    """
+    with open(filename, "wb") as fd:
+        writer = csv.writer(fd)
+        writer.writerow(FLOW_FIELDS)
+        writer.writerows([flow[name] for name in FLOW_FIELDS] for flow in flows)
+    if flow_samples is not None:
+        columns = get_series_columns(flow_samples)
+        with open(get_series_filename(filename), "wb") as fd:
+            writer = csv.writer(fd)
+            writer.writerow(SERIES_FIELDS)
+            writer.writerows(zip(*[columns[name].tolist() for name in SERIES_FIELDS]))
+
+def save_npz(filename, flows, flow_samples=None):
+    """
+    Save flow summaries (arrays flow_FIELD) and time series (arrays
+    series_FIELD) to a compressed NumPy NPZ file.
+    """
+    arrays = dict(("flow_" + name, column)
+        for (name, column) in get_flow_columns(flows).iteritems())
+    if flow_samples is not None:
+        arrays.update(("series_" + name, column)
+            for (name, column) in get_series_columns(flow_samples).iteritems())
+    with open(filename, "wb") as fd:
+        numpy.savez_compressed(fd, **arrays)
+
+def save_results(filename, flows, flow_samples=None):
+    """Save results to filename, the format is given by its extension (csv or npz)."""
+    savers = {".csv": save_csv, ".npz": save_npz}
+    ext = os.path.splitext(filename)[1].lower()
+    if ext not in savers:
+        raise ValueError, "Unknown results format (%s): %s" % \
+            (", ".join(sorted(savers)), filename)
+    savers[ext](filename, flows, flow_samples)
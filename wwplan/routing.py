@@ -0,0 +1,218 @@
+"""
+Static routes computed from a network plan (see wwplan.plan).
+
+Networks are stars (AP/BS node + terminals) connected through the units
+they share, forming a tree. A unit (preferably an AP/BS node that is not a
+terminal of any network) is taken as the root of each connected tree, and
+every other unit gets:
+
+    * A default route to its parent (the member of the network that 
+      connects it towards the root).
+    * Routes to the subnets of its downstream subtree, through the child
+      member that leads to them.
+
+The number of routes is the number of units plus, for each subnet, the
+depth of the unit it hangs from (linear for trees of bounded depth).
+"""
+import collections
+
+from wwplan import lib
+from wwplan import addressing
+
+# Route (network, prefix length) matching all addresses
+DEFAULT_NETWORK = ("0.0.0.0", 0)
+
+class Route(lib.Record):
+    """
+    Route of a node to a subnet (network address, prefix length) through
+    gateway (address), using the device of the node in network net_name.
+    """
+    __slots__ = ("network", "prefix", "gateway", "net_name")
+
+def get_unit_networks(plan):
+    """Return a dictionary of pairs (unit name, sorted list of network names)."""
+    unit_networks = {}
+    for net_name, network_plan in sorted(plan["networks"].iteritems()):
+        for name in network_plan["subnet"]["addresses"]:
+            unit_networks.setdefault(name, []).append(net_name)
+    return unit_networks
+
+def get_roots(plan, unit_networks):
+    """
+    Return the units sorted by preference to be the root of a tree: AP/BS 
+    nodes that are not terminals of any network first.
+    """
+    networks = plan["networks"].values()
+    nodes = set(network_plan["node"] for network_plan in networks)
+    terminals = set(name for network_plan in networks for name in network_plan["terminals"])
+    return sorted(unit_networks, key=lambda name: 
+        (name not in nodes, name in terminals, name))
+
+def get_routing_tree(plan, unit_networks):
+    """
+    Return pair (parents, owners) of the routing tree (breadth-first from
+    the roots, see get_roots) of a plan. Parents is a dictionary of pairs 
+    (unit name, (network name, parent name)), None for roots. Owners is a 
+    dictionary of pairs (network name, unit name), the unit the network 
+    hangs from (its member nearest to the root).
+    """
+    networks = plan["networks"]
+    parents, owners = {}, {}
+    for root in get_roots(plan, unit_networks):
+        if root in parents:
+            continue
+        parents[root] = None
+        queue = collections.deque([root])
+        while queue:
+            name = queue.popleft()
+            for net_name in unit_networks[name]:
+                if net_name in owners:
+                    continue
+                owners[net_name] = name
+                for member in sorted(networks[net_name]["subnet"]["addresses"]):
+                    if member not in parents:
+                        parents[member] = (net_name, name)
+                        queue.append(member)
+    return parents, owners
+
+def get_routes(plan):
+    """Return a dictionary of pairs (unit name, list of routes) for a plan."""
+    networks = plan["networks"]
+    unit_networks = get_unit_networks(plan)
+    parents, owners = get_routing_tree(plan, unit_networks)
+    def _get_route(network, prefix, net_name, gateway_name):
+        gateway = networks[net_name]["subnet"]["addresses"][gateway_name]
+        return Route(network=network, prefix=prefix, gateway=gateway, net_name=net_name)
+    
+    routes = dict((name, []) for name in unit_networks)
+    for name, parent in parents.iteritems():
+        if parent:
+            net_name, parent_name = parent
+            routes[name].append(_get_route(DEFAULT_NETWORK[0], DEFAULT_NETWORK[1],
+                net_name, parent_name))
+    for subnet_name, owner in sorted(owners.iteritems()):
+        subnet = networks[subnet_name]["subnet"]
+        child = owner
+        while parents[child]:
+            net_name, parent_name = parents[child]
+            routes[parent_name].append(_get_route(subnet["network"], subnet["prefix"],
+                net_name, child))
+            child = parent_name
+    return routes
+
+def lookup_route(routes, address):
+    """
+    Return the route (longest prefix match) for an address, None if there is
+    no route. Routes are objects with attributes network and prefix.
+    """
+    value = addressing.ip_to_int(address)
+    def _matches(route):
+        shift = 32 - route.prefix
+        return (value >> shift) == (addressing.ip_to_int(route.network) >> shift)
+    matching = [route for route in routes if _matches(route)]
+    return (max(matching, key=lambda route: route.prefix) if matching else None)
+
+def get_next_hops(plan, routes):
+    """
+    Yield tuples (unit name, destination address, gateway) for all pairs of
+    units in the plan. Gateway is None for directly connected destinations
+    and for destinations with no route.
+    """
+    unit_networks = get_unit_networks(plan)
+    all_addresses = sorted(set((name, address)
+        for network_plan in plan["networks"].itervalues()
+        for (name, address) in network_plan["subnet"]["addresses"].iteritems()))
+    for name in sorted(unit_networks):
+        local_networks = [plan["networks"][net_name]["subnet"]
+            for net_name in unit_networks[name]]
+        local_routes = [lib.Struct("LocalRoute", network=subnet["network"],
+            prefix=subnet["prefix"]) for subnet in local_networks]
+        for destination, address in all_addresses:
+            if destination == name or lookup_route(local_routes, address):
+                continue
+            route = lookup_route(routes[name], address)
+            yield (name, address, (route.gateway if route else None))
+
+def get_routing_mismatches(plan, routes, reference_routes):
+    """
+    Compare routes with reference routes (i.e. extracted from ns-3 global 
+    routing, gateway None for direct routes) for all pairs of units. Yield 
+    tuples (unit name, destination address, gateway, reference gateway) 
+    when the next hops differ.
+    """
+    for name, address, gateway in get_next_hops(plan, routes):
+        reference_route = lookup_route(reference_routes.get(name, []), address)
+        reference_gateway = (reference_route.gateway if reference_route else None)
+        if gateway != reference_gateway:
+            yield (name, address, gateway, reference_gateway)
+
+def get_address_units(plan):
+    """Return a dictionary of pairs (address, unit name) for a plan."""
+    return dict((address, name) for network_plan in plan["networks"].itervalues()
+        for (name, address) in network_plan["subnet"]["addresses"].iteritems())
+
+def get_path(plan, routes, source, address, unit_networks=None, address_units=None):
+    """
+    Return the path from unit source to an address as a list of hops
+    (network name, unit name, next unit name). Raise a ValueError if
+    there is no route. Indexes unit_networks (see get_unit_networks) and
+    address_units (see get_address_units) are built if not given.
+    """
+    unit_networks = unit_networks or get_unit_networks(plan)
+    address_units = address_units or get_address_units(plan)
+    if address not in address_units:
+        raise ValueError, "Address not found in plan: %s" % address
+    destination = address_units[address]
+    path = []
+    name = source
+    while len(path) <= len(unit_networks):
+        if name == destination:
+            return path
+        for net_name in unit_networks[name]:
+            if destination in plan["networks"][net_name]["subnet"]["addresses"]:
+                return path + [(net_name, name, destination)]
+        route = lookup_route(routes[name], address)
+        if route is None:
+            break
+        next_name = address_units[route.gateway]
+        path.append((route.net_name, name, next_name))
+        name = next_name
+    raise ValueError, "No route from %s to %s" % (source, address)
+
+def get_shortest_paths(plan, unit_networks, source):
+    """
+    Return the tree of shortest paths (in hops, breadth-first) from unit
+    source as a dictionary of pairs (unit name, (network name, previous 
+    unit name)), None for the source.
+    """
+    networks = plan["networks"]
+    previous = {source: None}
+    visited_networks = set()
+    queue = collections.deque([source])
+    while queue:
+        name = queue.popleft()
+        for net_name in unit_networks[name]:
+            if net_name in visited_networks:
+                continue
+            visited_networks.add(net_name)
+            for member in sorted(networks[net_name]["subnet"]["addresses"]):
+                if member not in previous:
+                    previous[member] = (net_name, name)
+                    queue.append(member)
+    return previous
+
+def get_path_to_unit(shortest_paths, destination):
+    """
+    Return the path (list of hops, see get_path) to a unit from a tree of 
+    shortest paths (see get_shortest_paths). Raise a ValueError if the unit 
+    is not reachable.
+    """
+    if destination not in shortest_paths:
+        raise ValueError, "No path to %s" % destination
+    path = []
+    name = destination
+    while shortest_paths[name]:
+        net_name, previous_name = shortest_paths[name]
+        path.append((net_name, previous_name, name))
+        name = previous_name
+    return path[::-1]
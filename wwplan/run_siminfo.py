@@ -5,27 +5,110 @@ import optparse
 import operator
 import pprint
 import logging
+import math
 
-import yaml
-
-import ns3
+from wwplan.ns3_module import ns3
 from wwplan import ns3_lib
 from wwplan import network as wwnetwork
+from wwplan import capacity
+import wwplan.netinfo
+
+# ns-3 log flags (ns3.LOG_<FLAG>), checked without loading the ns-3 bindings
+LOG_FLAGS = set([
+    "none", "error", "level_error", "warn", "level_warn", "debug", "level_debug",
+    "info", "level_info", "function", "level_function", "logic", "level_logic",
+    "all", "level_all", "prefix_func", "prefix_time", "prefix_node",
+])
 
 def filter_dict_by_keys(d, reject_keys):
     """Return dictionary with pairs in d except those with keys in 'rejects_keys'"""
     return dict((k, v) for (k, v) in d.iteritems() if k not in reject_keys)
     
+def get_siminfo_errors(config):
+    """Yield error messages for a siminfo structure (empty if it's valid)."""
+    def _check_list_of_dicts(key, items, required_keys, available_types=None):
+        items = items or []
+        if not isinstance(items, list):
+            yield "'%s' must be a list" % key
+            return
+        for item in items:
+            if not isinstance(item, dict):
+                yield "'%s' items must be dictionaries: %s" % (key, item)
+                continue
+            missing = [k for k in required_keys if k not in item]
+            if missing:
+                yield "'%s' item has no %s: %s" % (key, ", ".join(missing), item)
+            if available_types is not None and item.get("type") not in available_types:
+                yield "'%s' type '%s' not found, available: %s" % \
+                    (key, item.get("type"), ", ".join(available_types))
+
+    if not isinstance(config, dict):
+        yield "Siminfo must be a dictionary"
+        return
+    for key in ["description", "version", "netinfo"]:
+        if key not in config:
+            yield "missing compulsory variable: %s" % key
+    for key in ["simulation", "results"]:
+        if not isinstance(config.get(key), dict):
+            yield "'%s' must be a dictionary" % key
+    if "apps" not in config:
+        yield "missing compulsory variable: apps"
+        
+    logs = config.get("logs") or {}
+    if not isinstance(logs, dict):
+        yield "'logs' must be a dictionary"
+    else:
+        for name, string_flags in logs.iteritems():
+            for flag in str(string_flags).split("|"):
+                if flag.lower() not in LOG_FLAGS:
+                    yield "Log '%s': unknown flag '%s'" % (name, flag)
+            
+    results = (config["results"] if isinstance(config.get("results"), dict) else {})
+    checks = [
+        ("apps", config.get("apps"), ["type"], ns3_lib.get_available_applications()),
+        ("wimax_service_flows", config.get("wimax_service_flows"), ["install", "source", 
+          "dest", "protocol", "direction", "scheduling", "priority"], None),
+        ("plots", results.get("plots"), ["type"], ns3_lib.get_available_plots()),
+    ]
+    for key, items, required_keys, available_types in checks:
+        for error in _check_list_of_dicts(key, items, required_keys, available_types):
+            yield error
+    apps = config.get("apps")
+    for app in (apps if isinstance(apps, list) else []):
+        if isinstance(app, dict):
+            for error in capacity.get_app_errors(app):
+                yield error
+
+def get_max_samples(simulation):
+    """
+    Return the maximum number of flow-monitor samples per flow for the
+    simulation settings of a siminfo: max_samples if given, otherwise the
+    samples taken in the duration, so series never drop samples but are
+    still bounded. Return None (no bound) if there is no duration either.
+    """
+    if simulation.get("max_samples"):
+        return simulation["max_samples"]
+    elif simulation.get("duration"):
+        step = simulation.get("interval", 0.1) * simulation.get("monitor_batch", 1)
+        return int(math.ceil(simulation["duration"] / step)) + 1
+
+def validate_siminfo(config):
+    """Check a siminfo structure, raise a ValueError with all errors found."""
+    errors = list(get_siminfo_errors(config))
+    if errors:
+        raise ValueError, "Invalid siminfo:\n  %s" % "\n  ".join(errors)
+    
 def siminfo(filename, stream=sys.stdout):
     """Run a simulation YML file."""
     logging.debug("Open simulation file: %s" % filename)
-    config = yaml.load(open(filename).read())
+    config = wwplan.netinfo.load_yaml_file(filename)
+    validate_siminfo(config)
     logging.info("Simulation: %s (%s)" % (config["description"], config["version"]))
-    logging.debug("Simulation YAML:")
-    for line in pprint.pformat(config).splitlines(): 
-        logging.debug(line)
+    if logging.getLogger().isEnabledFor(logging.DEBUG):
+        logging.debug("Simulation YAML:")
+        for line in pprint.pformat(config).splitlines(): 
+            logging.debug(line)
         
-    assert "netinfo" in config, "missing compulsory variable: netinfo"
     siminfo_dir = os.path.dirname(os.path.abspath(filename))
     netinfo_path = os.path.join(siminfo_dir, config["netinfo"])
     network = wwnetwork.create_network_from_yaml_file(netinfo_path)
@@ -45,9 +128,8 @@ def siminfo(filename, stream=sys.stdout):
             "Application type '%s' not found, available: %s" % \
             (app["type"], ", ".join(available_applications.keys()))
         app_kwargs = filter_dict_by_keys(app, ["type"])
-        app_func = available_applications[app["type"]]
         logging.debug("Add application: %s (%s)" % (app["type"], app_kwargs))
-        app_func(network, **app_kwargs)
+        network.backend.install_application(network, app["type"], app_kwargs)
 
     for flow in config.get("wimax_service_flows", []):
         logging.debug("Add service flow: %s" % flow)
@@ -55,8 +137,12 @@ def siminfo(filename, stream=sys.stdout):
     
     # Enable flow-monitor & tracking    
     interval = config["simulation"].get("interval", 0.1)
-    logging.debug("Flow monitor interval: %s seconds" % interval)
-    monitor_info = ns3_lib.enable_monitor(network, interval)
+    max_samples = get_max_samples(config["simulation"])
+    delta = config["simulation"].get("delta_samples", False)
+    batch = config["simulation"].get("monitor_batch", 1)
+    logging.debug("Flow monitor interval: %s seconds (batch: %d, max samples: %s)" % 
+        (interval, batch, max_samples))
+    monitor_info = ns3_lib.enable_monitor(network, interval, max_samples, delta, batch)
 
     for options in config["results"].get("save_pcap", []):
         device = network.nodes[options["node"]].devices[options["device"]]
@@ -69,6 +155,10 @@ def siminfo(filename, stream=sys.stdout):
             
     # Results
     ns3_lib.print_monitor_results(monitor_info, stream=stream)    
+    for export_path in config["results"].get("export", []):
+        export_path = os.path.join(siminfo_dir, export_path)
+        logging.debug("Export results: %s" % export_path)
+        ns3_lib.save_monitor_results(monitor_info, export_path)
     if "monitor" in config["results"]:
         xmlfile = results["monitor"].get("save_xml")
         if xmlfile:
@@ -91,13 +181,18 @@ def main(args):
     parser = optparse.OptionParser(usage)
     parser.add_option('-v', '--verbose', dest='vlevel', action="count",
         default=0, help='Increase verbose level)')
+    parser.add_option('-e', '--estimate', dest='estimate', action="store_true",
+        default=False, help='Estimate capacity analytically (no simulation)')
     options, args0 = parser.parse_args(args)
     ns3_lib.set_logging_level(options.vlevel)
     if not args0:
         parser.print_help()
         return 2
     siminfo_path, = args0
-    siminfo(siminfo_path)
+    if options.estimate:
+        capacity.print_estimate(capacity.estimate_siminfo_file(siminfo_path))
+    else:
+        siminfo(siminfo_path)
 
 if __name__ == '__main__':
     sys.exit(main(sys.argv[1:]))
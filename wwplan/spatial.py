@@ -0,0 +1,106 @@
+"""
+Spatial index (2D k-d tree) for named locations (x, y) in meters.
+
+>>> index = SpatialIndex([("Urcos", (2533, -19694)), ("Urpay", (-16357, -1045))])
+>>> index.within("Urcos", 30000)
+>>> index.nearest((0, 0))
+>>> index.max_distance("Urcos", ["Urpay"])
+"""
+import numpy
+
+class SpatialIndex(object):
+    """
+    Index of named locations. The k-d tree is stored implicitly: names and
+    points are sorted so each segment [start, end) of the arrays is a tree
+    node split at its middle point (axis alternates with depth).
+    """
+    def __init__(self, locations):
+        locations = list(locations)
+        self.names = [name for (name, location) in locations]
+        self.points = numpy.array([location for (name, location) in locations],
+            dtype=float).reshape(-1, 2)
+        self.indexes = dict((name, index) for (index, name) in enumerate(self.names))
+        order = numpy.arange(len(self.names))
+        self._sort(order, 0, len(order), 0)
+        self._order = order
+        self._tree_points = self.points[order]
+
+    def __len__(self):
+        return len(self.names)
+
+    def _sort(self, order, start, end, axis):
+        """Sort (in place) order[start:end] as a k-d tree segment."""
+        while end - start > 1:
+            middle = (start + end) // 2
+            values = self.points[order[start:end], axis]
+            partition = numpy.argsort(values, kind="mergesort")
+            order[start:end] = order[start:end][partition]
+            self._sort(order, middle + 1, end, 1 - axis)
+            end, axis = middle, 1 - axis
+
+    def get_point(self, name_or_point):
+        """Return the (x, y) array for a location name or a point."""
+        if isinstance(name_or_point, basestring):
+            return self.points[self.indexes[name_or_point]]
+        return numpy.asarray(name_or_point, dtype=float)
+
+    def distance(self, location1, location2):
+        """Return distance (meters) between two locations (names or points)."""
+        point1, point2 = map(self.get_point, [location1, location2])
+        return float(numpy.hypot(*(point2 - point1)))
+
+    def distances(self, location, names):
+        """Return an array of distances from location to the named locations."""
+        point = self.get_point(location)
+        points = self.points[[self.indexes[name] for name in names]].reshape(-1, 2)
+        return numpy.hypot(points[:, 0] - point[0], points[:, 1] - point[1])
+
+    def max_distance(self, location, names):
+        """Return maximum distance from location to the named locations."""
+        return float(self.distances(location, names).max())
+
+    def within(self, location, radius):
+        """Return names of locations whose distance to location is <= radius."""
+        point = self.get_point(location)
+        result = []
+        stack = [(0, len(self._order), 0)]
+        while stack:
+            start, end, axis = stack.pop()
+            if start >= end:
+                continue
+            middle = (start + end) // 2
+            middle_point = self._tree_points[middle]
+            if numpy.hypot(*(middle_point - point)) <= radius:
+                result.append(self._order[middle])
+            delta = point[axis] - middle_point[axis]
+            if delta - radius <= 0:
+                stack.append((start, middle, 1 - axis))
+            if delta + radius >= 0:
+                stack.append((middle + 1, end, 1 - axis))
+        return [self.names[index] for index in sorted(result)]
+
+    def nearest(self, location, exclude=()):
+        """Return (name, distance) for the location nearest to location."""
+        point = self.get_point(location)
+        best = [None, numpy.inf]
+        def _search(start, end, axis):
+            if start >= end:
+                return
+            middle = (start + end) // 2
+            middle_point = self._tree_points[middle]
+            name = self.names[self._order[middle]]
+            distance = numpy.hypot(*(middle_point - point))
+            if distance < best[1] and name not in exclude:
+                best[:] = [name, distance]
+            delta = point[axis] - middle_point[axis]
+            near, far = ([(start, middle), (middle + 1, end)] if delta < 0 else
+                         [(middle + 1, end), (start, middle)])
+            _search(near[0], near[1], 1 - axis)
+            if abs(delta) < best[1]:
+                _search(far[0], far[1], 1 - axis)
+        _search(0, len(self._order), 0)
+        return (best[0], float(best[1]))
+
+    def subset(self, names):
+        """Return a new SpatialIndex with the named locations."""
+        return SpatialIndex((name, self.points[self.indexes[name]]) for name in names)
@@ -0,0 +1,74 @@
+#!/usr/bin/python
+"""
+Verify the static routes computed from a plan (see wwplan.routing) against
+the routes of ns-3 global routing for a netinfo (or Radio Mobile report).
+
+Each topology must be verified in its own process, as ns-3 global routing
+works on all the nodes created in the process.
+"""
+import sys
+
+from wwplan.ns3_module import ns3
+from wwplan import lib
+from wwplan import routing
+from wwplan import network as wwnetwork
+
+def get_global_routes(ns3_node):
+    """Return the list of routes (network, prefix, gateway) of a ns-3 node global routing."""
+    ipv4 = ns3_node.GetObject(ns3.Ipv4.GetTypeId())
+    list_routing = ipv4.GetRoutingProtocol()
+    for index in range(list_routing.GetNRoutingProtocols()):
+        protocol, priority = list_routing.GetRoutingProtocol(index)
+        if isinstance(protocol, ns3.Ipv4GlobalRouting):
+            break
+    else:
+        return []
+    routes = []
+    for index in range(protocol.GetNRoutes()):
+        entry = protocol.GetRoute(index)
+        gateway = str(entry.GetGateway())
+        prefix = bin(entry.GetDestNetworkMask().Get()).count("1")
+        routes.append(lib.Struct("GlobalRoute", network=str(entry.GetDest()), 
+            prefix=prefix, gateway=(None if gateway == "0.0.0.0" else gateway)))
+    return routes
+
+def verify_routing(network):
+    """
+    Return the list of mismatches (see routing.get_routing_mismatches) 
+    between static routes and global routes of a network (created with 
+    global routing).
+    """
+    global_routes = dict((name, get_global_routes(node.ns3_node))
+        for (name, node) in network.nodes.iteritems())
+    routes = routing.get_routes(network.plan)
+    return list(routing.get_routing_mismatches(network.plan, routes, global_routes))
+
+### Main
+
+def main(args, stream=sys.stdout):
+    import optparse
+    usage = """Usage: %prog [OPTIONS] NETINFO
+
+    Compare static routes computed from the netinfo with ns-3 global routing."""
+    parser = optparse.OptionParser(usage)
+    parser.add_option('-r', '--report', dest='report', 
+      default=None, help='Use a Radio Mobile report file')
+    options, args0 = parser.parse_args(args)
+    
+    if options.report:
+        network = wwnetwork.create_network_from_report_file(options.report)    
+    elif len(args0) == 1:
+        network = wwnetwork.create_network_from_yaml_file(args0[0])
+    else:
+        parser.print_help()
+        return 2
+    mismatches = verify_routing(network)
+    ns3.Simulator.Destroy()
+    for name, address, gateway, global_gateway in mismatches:
+        stream.write("%s -> %s: static gateway %s, global gateway %s\n" % 
+            (name, address, gateway, global_gateway))
+    stream.write("%d mismatches\n" % len(mismatches))
+    return (1 if mismatches else 0)
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))